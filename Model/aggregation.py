@@ -0,0 +1,91 @@
+import pandas as pd
+import numpy as np
+
+# Output columns of aggregate_shopkeeper_data, in order
+AGGREGATED_COLUMNS = [
+    'shopkeeper_id', 'name', 'business_type', 'transactions_per_month',
+    'on_time_payments', 'missed_payments', 'avg_transaction_amount',
+    'days_active', 'monthly_profit_avg', 'monthly_revenue_avg',
+    'monthly_loss_count', 'avg_profit_margin', 'avg_expense_ratio',
+    'payment_reliability', 'profit_trend', 'revenue_trend'
+]
+
+def grouped_slope(keys, x, y):
+    """Least-squares slope of y on x for every group in a single pass
+
+    Equivalent to running scipy.stats.linregress per group, but computed from
+    grouped sums of the centred x values so no Python loop is needed.
+    """
+    frame = pd.DataFrame({'key': keys, 'x': x, 'y': y})
+    grouped = frame.groupby('key', sort=True)
+    x_centred = frame['x'] - grouped['x'].transform('mean')
+    sums = pd.DataFrame({
+        'key': frame['key'],
+        'sxy': x_centred * frame['y'],
+        'sxx': x_centred * x_centred
+    }).groupby('key', sort=True).sum()
+    # Single-point groups have sxx == 0 and no defined slope
+    return (sums['sxy'] / sums['sxx'].where(sums['sxx'] != 0)).fillna(0)
+
+def relative_trend(slope, months, first_value):
+    """Express a slope as % change over the period relative to the first month"""
+    first_value = np.asarray(first_value, dtype=float)
+    safe_first = np.where(first_value != 0, np.abs(first_value), 1.0)
+    trend = np.asarray(slope, dtype=float) * np.asarray(months) / safe_first * 100
+    return np.where((first_value != 0) & (np.asarray(months) > 1), trend, 0.0)
+
+def aggregate_shopkeeper_data(df):
+    """Aggregate monthly ledger rows into one feature row per shopkeeper
+
+    Columnar replacement for the per-group loop: every metric is a grouped
+    pandas reduction and the profit/revenue trends use a closed-form grouped
+    least-squares slope instead of calling linregress for each shop.
+    """
+    # Shopkeeper, then month within the group. With the ordered month
+    # categorical from ingest.load_ledger this is calendar order.
+    df = df.sort_values(['shopkeeper_id', 'month'], kind='mergesort').reset_index(drop=True)
+    shop_ids = df['shopkeeper_id']
+    position = df.groupby('shopkeeper_id', sort=False).cumcount()
+
+    # Per-row ratios averaged per shop
+    ratios = pd.DataFrame({
+        'shopkeeper_id': shop_ids,
+        'profit_margin': df['profit'] / df['revenue'],
+        'expense_ratio': df['expenses'] / df['revenue'],
+        'is_loss': (df['profit'] < 0).astype('int64')
+    })
+
+    grouped = df.groupby('shopkeeper_id', sort=True)
+    means = grouped[['transactions', 'avg_transaction_amount', 'profit', 'revenue']].mean()
+    # Counts may be downcast in the compact ledger schema; sum in int64
+    sums = grouped[['on_time_payments', 'missed_payments', 'transactions', 'days_active']].sum().astype('int64')
+    ratio_means = ratios.groupby('shopkeeper_id', sort=True)[['profit_margin', 'expense_ratio']].mean()
+    loss_counts = ratios.groupby('shopkeeper_id', sort=True)['is_loss'].sum()
+    months = grouped.size()
+
+    # First month of each shop supplies name, business type and the trend base
+    first = df.loc[position == 0].set_index('shopkeeper_id')
+
+    profit_slope = grouped_slope(shop_ids, position, df['profit'])
+    revenue_slope = grouped_slope(shop_ids, position, df['revenue'])
+
+    aggregated = pd.DataFrame({
+        'shopkeeper_id': means.index.astype('int64'),
+        'name': first['name'].to_numpy(),
+        'business_type': first['business_type'].to_numpy(),
+        'transactions_per_month': means['transactions'].to_numpy(),
+        'on_time_payments': sums['on_time_payments'].to_numpy(),
+        'missed_payments': sums['missed_payments'].to_numpy(),
+        'avg_transaction_amount': means['avg_transaction_amount'].to_numpy(),
+        'days_active': sums['days_active'].to_numpy(),
+        'monthly_profit_avg': means['profit'].to_numpy(),
+        'monthly_revenue_avg': means['revenue'].to_numpy(),
+        'monthly_loss_count': loss_counts.to_numpy(),
+        'avg_profit_margin': ratio_means['profit_margin'].to_numpy() * 100,
+        'avg_expense_ratio': ratio_means['expense_ratio'].to_numpy() * 100,
+        'payment_reliability': (sums['on_time_payments'] / sums['transactions']).to_numpy() * 100,
+        'profit_trend': relative_trend(profit_slope, months, first['profit']),
+        'revenue_trend': relative_trend(revenue_slope, months, first['revenue'])
+    })
+
+    return aggregated[AGGREGATED_COLUMNS]
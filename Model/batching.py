@@ -0,0 +1,107 @@
+import time
+import threading
+import numpy as np
+
+class _Batch:
+    __slots__ = ('rows', 'ready', 'done', 'results', 'error')
+
+    def __init__(self):
+        self.rows = []
+        self.ready = threading.Event()
+        self.done = threading.Event()
+        self.results = None
+        self.error = None
+
+class PredictionBatcher:
+    """Coalesces concurrent prediction calls into one vectorised model call
+
+    The first caller to find no open batch becomes its leader. If no other
+    batch is being predicted it calls ``predict_fn`` straight away, so an
+    uncontended request pays no extra latency. Otherwise it waits up to
+    ``max_wait`` seconds, or until the batch holds ``max_batch`` rows, then
+    closes the batch, calls ``predict_fn`` once on all of its rows and hands
+    every waiting caller its own slice of the result. Callers that arrive
+    meanwhile only add their rows and wait. The wait also hands the GIL to
+    request threads still parsing, which is what lets them join. There is
+    no background thread, so the batcher keeps working in forked server
+    workers.
+
+    ``on_batch(size, wait_seconds)`` is called after each model call, for
+    metrics.
+    """
+
+    def __init__(self, predict_fn, max_batch=64, max_wait=0.001, on_batch=None):
+        self.predict_fn = predict_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.on_batch = on_batch
+        self.batches = 0
+        self.rows = 0
+        self.largest_batch = 0
+        self._open = None
+        # Batches with a leader that has not finished predicting
+        self._active = 0
+        self._lock = threading.Lock()
+
+    def predict(self, rows):
+        """Predictions for ``rows``, computed together with concurrent callers"""
+        with self._lock:
+            batch = self._open
+            leader = batch is None
+            idle = False
+            if leader:
+                # Nothing is being predicted, so there is no load to coalesce
+                idle = self._active == 0
+                self._active += 1
+                batch = self._open = _Batch()
+            start = len(batch.rows)
+            batch.rows.extend(rows)
+            if len(batch.rows) >= self.max_batch or idle:
+                # Full or dispatched at once: later callers start a new batch
+                self._open = None
+                batch.ready.set()
+
+        if leader:
+            self._run(batch)
+        else:
+            batch.done.wait()
+
+        if batch.error is not None:
+            raise batch.error
+        return batch.results[start:start + len(rows)]
+
+    def _run(self, batch):
+        started = time.perf_counter()
+        batch.ready.wait(self.max_wait)
+        with self._lock:
+            if self._open is batch:
+                self._open = None
+        waited = time.perf_counter() - started
+
+        try:
+            batch.results = np.asarray(self.predict_fn(np.array(batch.rows)))
+        except Exception as e:
+            batch.error = e
+        finally:
+            batch.done.set()
+
+        size = len(batch.rows)
+        with self._lock:
+            self._active -= 1
+            self.batches += 1
+            self.rows += size
+            self.largest_batch = max(self.largest_batch, size)
+        if self.on_batch is not None:
+            self.on_batch(size, waited)
+
+    def stats(self):
+        """Counters for monitoring endpoints"""
+        with self._lock:
+            return {
+                'max_batch': self.max_batch,
+                'max_wait_seconds': self.max_wait,
+                'batches': self.batches,
+                'rows': self.rows,
+                'mean_batch_size': self.rows / self.batches if self.batches else 0.0,
+                'largest_batch': self.largest_batch
+            }
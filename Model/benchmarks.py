@@ -0,0 +1,336 @@
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import threading
+import subprocess
+import logging
+import shutil
+import tempfile
+import warnings
+import urllib.error
+import urllib.request
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+import sklearn
+from synthetic_data import generate_ledger
+from aggregation import aggregate_shopkeeper_data
+from scoring import pipeline_credit_scores, simple_credit_scores
+from risk_model import RISK_FEATURES, fit_risk_model
+from forest_eval import compile_model
+
+DEFAULT_SIZES = [1000, 100000, 1000000]
+DEFAULT_OUTPUT = 'benchmark_results.json'
+
+# Training is timed on at most this many rows so the largest size stays practical
+TRAIN_ROWS = 20000
+
+# GradientBoostingClassifier is only timed up to this many shops
+GBC_MAX_ROWS = 5000
+
+INFERENCE_BATCH_SIZES = [1, 256, 10000]
+ENDPOINT_CONCURRENCY = [1, 8, 32]
+ENDPOINT_REQUESTS = 400
+ENDPOINT_BATCH_SIZE = 100
+# Distinct records a load test sends, so no level reuses another's
+ENDPOINT_RECORDS = len(ENDPOINT_CONCURRENCY) * ENDPOINT_REQUESTS * ENDPOINT_BATCH_SIZE
+SALE_COUNTS = [10, 100, 1000]
+BLOCK_SIZES = [1, 100]
+VERIFY_SAMPLE = 100
+MINING_DIFFICULTY = 4
+
+# Ratio of new to baseline time above which --compare reports a regression
+REGRESSION_THRESHOLD = 1.2
+
+def timed(fn, repeat=3):
+    """Best wall time of ``repeat`` runs, and the last result"""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+class BenchmarkRun:
+    """Collects benchmark results and writes them as JSON"""
+
+    def __init__(self, repeat=3):
+        self.repeat = repeat
+        self.results = []
+
+    def record(self, benchmark, seconds, items=None, **params):
+        result = {'benchmark': benchmark, **params, 'seconds': round(seconds, 6)}
+        if items:
+            result['items'] = items
+            result['items_per_second'] = round(items / seconds, 2) if seconds > 0 else None
+        self.results.append(result)
+        print(f"{benchmark:<40} {json.dumps(params):<45} {seconds * 1000:>12.2f} ms")
+        return result
+
+    def time(self, benchmark, fn, items=None, repeat=None, **params):
+        seconds, result = timed(fn, repeat or self.repeat)
+        self.record(benchmark, seconds, items, **params)
+        return result
+
+    def skip(self, benchmark, reason, **params):
+        self.results.append({'benchmark': benchmark, **params, 'skipped': reason})
+        print(f"{benchmark:<40} skipped: {reason}")
+
+    def write(self, path):
+        with open(path, 'w') as f:
+            json.dump({'metadata': run_metadata(), 'results': self.results}, f, indent=2)
+
+def run_metadata():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, timeout=10).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        'git_commit': commit or None,
+        'timestamp': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'sklearn': sklearn.__version__,
+        'cpu_count': os.cpu_count(),
+        'platform': platform.platform()
+    }
+
+def bench_pipeline(run, shops):
+    """Generation, aggregation, rule scoring and model training for one size"""
+    ledger = run.time('generate_ledger', lambda: generate_ledger(shops), items=shops * 6, repeat=1, shops=shops)
+    aggregated = run.time('aggregate_shopkeeper_data', lambda: aggregate_shopkeeper_data(ledger),
+                          items=len(ledger), shops=shops)
+    scores, categories = run.time('pipeline_credit_scores', lambda: pipeline_credit_scores(aggregated),
+                                  items=shops, shops=shops)
+    run.time('simple_credit_scores', lambda: simple_credit_scores(ledger), items=len(ledger), shops=shops)
+
+    # Credit risk classifier on aggregated shops
+    aggregated['risk_category'] = categories
+    aggregated['business_type_encoded'] = aggregated['business_type'].astype('category').cat.codes
+    sample = aggregated.sample(n=min(len(aggregated), TRAIN_ROWS), random_state=42)
+    for booster in ['hist', 'gbc']:
+        if booster == 'gbc' and len(sample) > GBC_MAX_ROWS:
+            run.skip('fit_risk_model', f'gbc is only timed up to {GBC_MAX_ROWS} rows', shops=shops, booster=booster)
+            continue
+        run.time('fit_risk_model', lambda: fit_risk_model(sample[RISK_FEATURES], sample['risk_category'], booster),
+                 items=len(sample), repeat=1, shops=shops, booster=booster)
+
+    # API random forest on monthly rows
+    import credit_api
+    rows = ledger.sample(n=min(len(ledger), TRAIN_ROWS), random_state=42)
+    model, _ = run.time('fit_api_model', lambda: credit_api.fit_model(rows, save=False),
+                        items=len(rows), repeat=1, shops=shops)
+    return ledger, model
+
+def feature_rows(ledger, count):
+    import credit_api
+    records = ledger[credit_api.REQUIRED_FIELDS].head(count).to_dict('records')
+    return records, np.array([credit_api.prepare_features(record) for record in records], dtype=float)
+
+def bench_inference(run, ledger, model):
+    """sklearn and flat-array forest predictions at several batch sizes"""
+    compiled = compile_model(model)
+    _, X = feature_rows(ledger, max(INFERENCE_BATCH_SIZES))
+    for batch_size in INFERENCE_BATCH_SIZES:
+        batch = X[:batch_size]
+        run.time('predict', lambda: model.predict(batch), items=batch_size, evaluator='sklearn', batch_size=batch_size)
+        if compiled is not None:
+            run.time('predict', lambda: compiled.predict(batch), items=batch_size, evaluator='flat', batch_size=batch_size)
+
+def _post_json(url, payload):
+    request = urllib.request.Request(url, data=json.dumps(payload).encode(), headers={'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(request, timeout=60) as response:
+            response.read()
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+def load_test(run, base_url, records, server, clear_cache=None):
+    """POST the single and batch scoring endpoints at increasing concurrency
+
+    Each concurrency level sends fresh records, so a server's prediction
+    cache does not turn later levels into cache hits.
+    """
+    endpoints = [('/calculate_credit_score', 1), ('/calculate_credit_scores', ENDPOINT_BATCH_SIZE)]
+    for path, records_per_request in endpoints:
+        for level, concurrency in enumerate(ENDPOINT_CONCURRENCY):
+            if clear_cache is not None:
+                clear_cache()
+            offset = level * ENDPOINT_REQUESTS * records_per_request
+            latencies = []
+
+            def call(i):
+                start = (offset + i * records_per_request) % len(records)
+                batch = records[start:start + records_per_request]
+                payload = batch[0] if records_per_request == 1 else batch
+                started = time.perf_counter()
+                status = _post_json(base_url + path, payload)
+                latencies.append(time.perf_counter() - started)
+                return status
+
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                statuses = list(pool.map(call, range(ENDPOINT_REQUESTS)))
+            elapsed = time.perf_counter() - started
+
+            result = run.record(f'POST {path}', elapsed, items=ENDPOINT_REQUESTS, server=server,
+                                concurrency=concurrency, records_per_request=records_per_request)
+            result.update({
+                'latency_p50_ms': round(float(np.percentile(latencies, 50)) * 1000, 3),
+                'latency_p95_ms': round(float(np.percentile(latencies, 95)) * 1000, 3),
+                'latency_p99_ms': round(float(np.percentile(latencies, 99)) * 1000, 3),
+                'errors': sum(status != 200 for status in statuses)
+            })
+
+def bench_endpoints(run, ledger, model):
+    """Scoring endpoints under concurrent HTTP load on an in-process threaded server"""
+    from werkzeug.serving import make_server
+    import credit_api
+
+    credit_api.install_model(model, 'benchmark')
+    server = make_server('127.0.0.1', 0, credit_api.app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        records, _ = feature_rows(ledger, ENDPOINT_RECORDS)
+        load_test(run, f'http://127.0.0.1:{server.server_port}', records, 'werkzeug-threaded',
+                  clear_cache=credit_api.prediction_cache.clear)
+    finally:
+        server.shutdown()
+
+def bench_blockchain(run):
+    """SalesBlockchain sales, validation and verification at growing sale counts, and mining"""
+    blockchain_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'blockchain')
+    sys.path.insert(0, blockchain_dir)
+    try:
+        import SalesRecord
+        catalog = SalesRecord.product_catalog
+    except Exception as e:
+        run.skip('SalesBlockchain', f'{type(e).__name__}: {e}')
+        return
+    finally:
+        sys.path.remove(blockchain_dir)
+
+    for block_size in BLOCK_SIZES:
+        chain = SalesRecord.SalesBlockchain(difficulty=2, max_block_transactions=block_size)
+        sales = []
+        for count in SALE_COUNTS:
+            added = count - len(sales)
+            def grow():
+                for i in range(added):
+                    sales.append(chain.add_sale(f'Store-{i % 5}', catalog[i % len(catalog):][:3]))
+                chain.mine_pending()
+            params = {'sales': count, 'block_size': block_size}
+            run.time('SalesBlockchain.add_sale', grow, items=added, repeat=1, difficulty=2, **params)
+            # Only the blocks added since the previous check, then the whole chain
+            run.time('SalesBlockchain.is_chain_valid', chain.is_chain_valid, items=added, repeat=1,
+                     mode='incremental', **params)
+            run.time('SalesBlockchain.is_chain_valid', lambda: chain.is_chain_valid(full=True), items=count,
+                     mode='full', **params)
+            if (os.cpu_count() or 1) > 1:
+                run.time('SalesBlockchain.is_chain_valid',
+                         lambda: chain.is_chain_valid(full=True, processes=os.cpu_count()), items=count,
+                         mode='parallel', processes=os.cpu_count(), **params)
+            sample = [sale.txid for sale in sales[::max(1, len(sales) // VERIFY_SAMPLE)]]
+            run.time('SalesBlockchain.verify_sale', lambda: [chain.verify_sale(txid) for txid in sample],
+                     items=len(sample), **params)
+
+    # Reopening a chain stored on disk, from its snapshot and by reindexing every block
+    directory = tempfile.mkdtemp(prefix='chain-')
+    try:
+        path = os.path.join(directory, 'chain')
+        stored = SalesRecord.SalesBlockchain(difficulty=2, path=path)
+        count = max(SALE_COUNTS)
+        for i in range(count):
+            stored.add_sale(f'Store-{i % 5}', catalog[i % len(catalog):][:3])
+        stored.mine_pending()
+        stored.close()
+        def reopen():
+            SalesRecord.SalesBlockchain(path=path).close()
+        run.time('SalesBlockchain.reopen', reopen, items=count, sales=count, snapshot=True)
+        def reopen_without_snapshot():
+            os.remove(os.path.join(path, SalesRecord.SNAPSHOT_FILE))
+            reopen()
+        run.time('SalesBlockchain.reopen', reopen_without_snapshot, items=count, sales=count, snapshot=False)
+    finally:
+        shutil.rmtree(directory)
+
+    # Proof of work for one block, in one process and across every core
+    block = SalesRecord.Block(1, [SalesRecord.SaleTransaction('Store-0', catalog[:3])], chain.get_last_block().hash)
+    for processes in sorted({1, os.cpu_count() or 1}):
+        pool = ProcessPoolExecutor(processes) if processes > 1 else None
+        try:
+            def mine():
+                block.nonce = 0
+                block.hash = block.calculate_hash()
+                block.mine_block(MINING_DIFFICULTY, pool, processes)
+            run.time('Block.mine_block', mine, difficulty=MINING_DIFFICULTY, processes=processes)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+def compare(results_path, baseline_path, threshold=REGRESSION_THRESHOLD):
+    """Print per-benchmark time ratios against a baseline; returns the regressions"""
+    def keyed(path):
+        with open(path) as f:
+            results = json.load(f)['results']
+        return {
+            json.dumps({k: v for k, v in result.items() if k not in ('seconds', 'items_per_second') and
+                        not k.startswith('latency_') and k != 'errors'}, sort_keys=True): result
+            for result in results if 'seconds' in result
+        }
+
+    current = keyed(results_path)
+    baseline = keyed(baseline_path)
+    regressions = []
+    for key in sorted(current.keys() & baseline.keys()):
+        ratio = current[key]['seconds'] / baseline[key]['seconds'] if baseline[key]['seconds'] else float('inf')
+        flag = 'REGRESSION' if ratio > threshold else ''
+        print(f"{ratio:>7.2f}x  {key}  {flag}")
+        if flag:
+            regressions.append(key)
+    return regressions
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the credit scoring hot paths on synthetic ledgers')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='Numbers of shopkeepers')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--skip', nargs='*', default=[], choices=['pipeline', 'inference', 'endpoints', 'blockchain'])
+    parser.add_argument('--compare', metavar='BASELINE', help='Earlier results file to compare against')
+    parser.add_argument('--url', help='Only load-test an already running scoring service at this base URL')
+    parser.add_argument('--server-label', default='external', help='Server name recorded with --url results')
+    args = parser.parse_args()
+
+    # The service predicts from plain arrays on a model fitted with a DataFrame
+    warnings.filterwarnings('ignore', message='X does not have valid feature names')
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+
+    run = BenchmarkRun(args.repeat)
+    if args.url:
+        ledger = generate_ledger(ENDPOINT_RECORDS // 6, seed=7)
+        records, _ = feature_rows(ledger, ENDPOINT_RECORDS)
+        load_test(run, args.url.rstrip('/'), records, args.server_label)
+    else:
+        ledger = model = None
+        if 'pipeline' not in args.skip:
+            for shops in args.sizes:
+                ledger, model = bench_pipeline(run, shops)
+        if ledger is not None and 'inference' not in args.skip:
+            bench_inference(run, ledger, model)
+        if ledger is not None and 'endpoints' not in args.skip:
+            bench_endpoints(run, ledger, model)
+        if 'blockchain' not in args.skip:
+            bench_blockchain(run)
+
+    run.write(args.output)
+    print(f"Wrote {len(run.results)} results to {args.output}")
+    if args.compare:
+        sys.exit(1 if compare(args.output, args.compare) else 0)
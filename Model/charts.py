@@ -0,0 +1,178 @@
+import os
+import shutil
+import hashlib
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+import numpy as np
+import seaborn as sns
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+# Default location of rendered charts, relative to Model/
+CHART_CACHE_DIR = 'charts'
+
+# Bump when chart styling changes so cached images are re-rendered
+CHART_VERSION = 1
+
+DEFAULT_WORKERS = 4
+
+def series_hash(kind, *parts):
+    """Cache key for a chart: its kind plus the exact data it is drawn from"""
+    digest = hashlib.sha256(f'{kind}:{CHART_VERSION}'.encode())
+    for part in parts:
+        if isinstance(part, str):
+            digest.update(b'S' + part.encode())
+        else:
+            array = np.asarray(part)
+            if array.dtype == object or array.dtype.kind in 'UT':
+                array = np.asarray([str(value) for value in array])
+                digest.update(b'L' + '\x1f'.join(array.tolist()).encode())
+            else:
+                array = np.ascontiguousarray(array, dtype=np.float64)
+                digest.update(b'A' + str(array.shape).encode() + array.tobytes())
+    return digest.hexdigest()
+
+def _new_figure(figsize):
+    # Figures built on the Agg canvas directly are headless, never registered
+    # with pyplot and safe to draw from worker threads
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    return fig
+
+def _save(fig, path):
+    """Write a figure atomically and release it"""
+    directory = os.path.dirname(path) or '.'
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-', suffix='.png')
+    os.close(fd)
+    try:
+        fig.savefig(tmp_path)
+        os.replace(tmp_path, path)
+    except Exception:
+        os.remove(tmp_path)
+        raise
+    finally:
+        fig.clear()
+    return path
+
+def render_trends(name, months, profit, revenue, transactions, path):
+    """Monthly profit/revenue lines over a transactions bar chart"""
+    fig = _new_figure((12, 8))
+    ax = fig.add_subplot()
+    months = [str(month) for month in months]
+    ax.plot(months, profit, 'o-', label='Profit', color='#4CAF50')
+    ax.plot(months, revenue, 'o-', label='Revenue', color='#2196F3')
+    ax.bar(months, transactions, alpha=0.3, label='Transactions', color='#9C27B0')
+    ax.set_title(f"Financial Trends: {name}", fontsize=16)
+    ax.set_xlabel('Month')
+    ax.set_ylabel('Amount (NPR) / Transactions')
+    ax.legend()
+    ax.grid(True, linestyle='--', alpha=0.3)
+    fig.tight_layout()
+    return _save(fig, path)
+
+def render_distribution(scores, path):
+    """Histogram of credit scores with the risk threshold marked"""
+    fig = _new_figure((12, 6))
+    ax = fig.add_subplot()
+    sns.histplot(np.asarray(scores, dtype=float), bins=20, kde=True, ax=ax)
+    ax.set_title('Credit Score Distribution Across Shopkeepers')
+    ax.set_xlabel('Credit Score')
+    ax.set_ylabel('Number of Shopkeepers')
+    ax.axvline(50, color='r', linestyle='--', alpha=0.5, label='Risk Threshold')
+    ax.legend()
+    fig.tight_layout()
+    return _save(fig, path)
+
+class ChartRenderer:
+    """Headless chart rendering on a worker pool with a content-addressed cache
+
+    Each chart is stored once under ``cache_dir`` as ``<kind>_<hash>.png``,
+    where the hash covers the data drawn. Asking for the same chart again
+    returns the cached file without rendering, and concurrent requests for
+    one chart share a single render. Methods return futures resolving to
+    the image path; when ``path`` is given the image is also copied there.
+    """
+
+    def __init__(self, cache_dir=CHART_CACHE_DIR, workers=DEFAULT_WORKERS):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='chart')
+        self._lock = threading.Lock()
+        self._pending = {}
+        self.hits = 0
+        self.renders = 0
+        self.pid = os.getpid()
+
+    def __getstate__(self):
+        # Worker processes get a fresh pool over the same cache directory
+        return {'cache_dir': self.cache_dir, 'workers': self._pool._max_workers}
+
+    def __setstate__(self, state):
+        self.__init__(state['cache_dir'], state['workers'])
+
+    def _submit(self, kind, key, render, path):
+        cached = os.path.join(self.cache_dir, f'{kind}_{key}.png')
+        with self._lock:
+            future = self._pending.get(cached)
+            if future is None and os.path.exists(cached):
+                self.hits += 1
+                future = Future()
+                future.set_result(cached)
+            elif future is None:
+                self.renders += 1
+                future = self._pool.submit(render, cached)
+                self._pending[cached] = future
+                future.add_done_callback(lambda _: self._forget(cached))
+        if path is None:
+            return future
+        return self._copy_when_done(future, path)
+
+    def _forget(self, cached):
+        with self._lock:
+            self._pending.pop(cached, None)
+
+    def _copy_when_done(self, future, path):
+        copied = Future()
+        def copy(done):
+            try:
+                shutil.copyfile(done.result(), path)
+                copied.set_result(path)
+            except Exception as e:
+                copied.set_exception(e)
+        future.add_done_callback(copy)
+        return copied
+
+    def trends(self, name, raw_data, path=None):
+        """Trend chart for one shop's monthly ledger rows (already in month order)"""
+        months = raw_data['month'].astype(str).to_numpy()
+        profit = raw_data['profit'].to_numpy()
+        revenue = raw_data['revenue'].to_numpy()
+        transactions = raw_data['transactions'].to_numpy()
+        key = series_hash('trends', str(name), months, profit, revenue, transactions)
+        render = lambda cached: render_trends(name, months, profit, revenue, transactions, cached)
+        return self._submit('trends', key, render, path)
+
+    def distribution(self, scores, path=None):
+        """Credit score distribution chart"""
+        scores = np.asarray(scores, dtype=float)
+        render = lambda cached: render_distribution(scores, cached)
+        return self._submit('distribution', series_hash('distribution', scores), render, path)
+
+    def stats(self):
+        with self._lock:
+            return {'cache_hits': self.hits, 'renders': self.renders, 'pending': len(self._pending)}
+
+    def close(self):
+        self._pool.shutdown(wait=True)
+
+_default_renderer = None
+_default_renderer_lock = threading.Lock()
+
+def get_renderer():
+    """Process-wide renderer, created on first use (and again after a fork)"""
+    global _default_renderer
+    with _default_renderer_lock:
+        if _default_renderer is None or _default_renderer.pid != os.getpid():
+            _default_renderer = ChartRenderer()
+        return _default_renderer
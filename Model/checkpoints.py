@@ -0,0 +1,64 @@
+import os
+import glob
+import hashlib
+import tempfile
+import joblib
+
+# Default location of pipeline stage checkpoints, relative to Model/
+CHECKPOINT_DIR = 'checkpoints'
+
+def file_hash(path, block_size=1 << 20):
+    """SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def stage_key(stage, *inputs):
+    """Checkpoint key of a stage from its upstream keys and parameters"""
+    digest = hashlib.sha256(stage.encode())
+    for value in inputs:
+        digest.update(b'\x1f' + repr(value).encode())
+    return digest.hexdigest()
+
+class CheckpointStore:
+    """Stage outputs on disk, keyed by a hash of everything they depend on
+
+    Each stage keeps only its latest checkpoint, stored as
+    ``<stage>-<key>.joblib``. A stage whose key is unchanged loads its
+    output instead of recomputing it.
+    """
+
+    def __init__(self, directory=CHECKPOINT_DIR):
+        self.directory = directory
+
+    def _path(self, stage, key):
+        return os.path.join(self.directory, f'{stage}-{key[:16]}.joblib')
+
+    def load(self, stage, key):
+        """Stored output for (stage, key), or None if there is none"""
+        path = self._path(stage, key)
+        if not os.path.exists(path):
+            return None
+        try:
+            return joblib.load(path)
+        except Exception:
+            # Unreadable checkpoint (e.g. written by another library version)
+            return None
+
+    def save(self, stage, key, value):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(stage, key)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix='.tmp-')
+        os.close(fd)
+        try:
+            joblib.dump(value, tmp_path)
+            os.replace(tmp_path, path)
+        except Exception:
+            os.remove(tmp_path)
+            raise
+        for stale in glob.glob(os.path.join(self.directory, f'{stage}-*.joblib')):
+            if stale != path:
+                os.remove(stale)
+        return value
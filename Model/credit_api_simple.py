@@ -1,9 +1,8 @@
 from flask import Flask, request, jsonify
 from flask_cors import CORS
-import random
-import math
 from datetime import datetime
 import logging
+from scoring import simple_credit_scores
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -12,58 +11,24 @@ logger = logging.getLogger(__name__)
 app = Flask(__name__)
 CORS(app)
 
+SCORE_FIELDS = [
+    'transactions', 'on_time_payments', 'missed_payments',
+    'avg_transaction_amount', 'profit', 'revenue', 'expenses', 'days_active'
+]
+
 def calculate_credit_score_simple(data):
     """Calculate credit score using simple mathematical formulas"""
     try:
-        # Extract data
-        transactions = data.get('transactions', 0)
-        on_time_payments = data.get('on_time_payments', 0)
-        missed_payments = data.get('missed_payments', 0)
-        avg_transaction_amount = data.get('avg_transaction_amount', 0)
-        profit = data.get('profit', 0)
-        revenue = data.get('revenue', 0)
-        expenses = data.get('expenses', 0)
-        days_active = data.get('days_active', 0)
-        
-        # Calculate derived metrics
-        total_payments = on_time_payments + missed_payments
-        payment_reliability = on_time_payments / total_payments if total_payments > 0 else 0
-        profit_margin = profit / revenue if revenue > 0 else 0
-        avg_daily_transactions = transactions / days_active if days_active > 0 else 0
-        
-        # Calculate credit score (0-100)
-        score = 0
-        
-        # Payment reliability (30 points)
-        score += payment_reliability * 30
-        
-        # Profit margin (25 points)
-        score += min(profit_margin * 100, 25)
+        # Extract data as single-row columns for the shared scoring engine
+        columns = {field: [data.get(field, 0)] for field in SCORE_FIELDS}
+        scores, risk_categories, metrics = simple_credit_scores(columns)
         
-        # Transaction volume (20 points)
-        score += min(transactions / 10, 20)
-        
-        # Daily transaction consistency (15 points)
-        score += min(avg_daily_transactions / 5, 15)
-        
-        # Profit trend (10 points)
-        if profit > 0:
-            score += 10
-        
-        # Ensure score is between 0 and 100
-        score = max(0, min(100, int(score)))
-        
-        # Determine risk category
-        if score >= 80:
-            risk_category = "Excellent"
-        elif score >= 60:
-            risk_category = "Good"
-        elif score >= 40:
-            risk_category = "Fair"
-        elif score >= 20:
-            risk_category = "Moderate Risk"
-        else:
-            risk_category = "High Risk"
+        score = int(scores[0])
+        risk_category = str(risk_categories[0])
+        transactions = data.get('transactions', 0)
+        payment_reliability = float(metrics['payment_reliability'][0])
+        profit_margin = float(metrics['profit_margin'][0])
+        avg_daily_transactions = float(metrics['avg_daily_transactions'][0])
         
         return {
             'credit_score': score,
@@ -0,0 +1,186 @@
+import os
+import json
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from charts import get_renderer
+
+# Shops handed to a worker process at a time
+REPORT_CHUNK_SIZE = 100
+
+def build_report(shop_data):
+    """Credit report dict for one row of the scored aggregated frame"""
+    report = {
+        'shopkeeper_id': shop_data['shopkeeper_id'],
+        'name': shop_data['name'],
+        'business_type': shop_data['business_type'],
+        'credit_score': shop_data['credit_score'],
+        'risk_category': shop_data['risk_category'],
+        'key_metrics': {
+            'avg_monthly_profit': f"NPR {shop_data['monthly_profit_avg']:,.0f}",
+            'profit_margin': f"{shop_data['avg_profit_margin']:.1f}%",
+            'payment_reliability': f"{shop_data['payment_reliability']:.1f}%",
+            'loss_months': f"{shop_data['monthly_loss_count']}/6 months",
+            'revenue_trend': f"{shop_data['revenue_trend']:.1f}%",
+            'profit_trend': f"{shop_data['profit_trend']:.1f}%"
+        },
+        'strengths': [],
+        'weaknesses': [],
+        'recommendations': []
+    }
+
+    # Identify strengths
+    if shop_data['payment_reliability'] > 90:
+        report['strengths'].append("Excellent payment reliability")
+    if shop_data['avg_profit_margin'] > 25:
+        report['strengths'].append("High profit margins")
+    if shop_data['profit_trend'] > 10:
+        report['strengths'].append("Strong profit growth trend")
+    if shop_data['monthly_loss_count'] == 0:
+        report['strengths'].append("No loss months in last 6 months")
+
+    # Identify weaknesses
+    if shop_data['payment_reliability'] < 80:
+        report['weaknesses'].append(f"Payment reliability needs improvement (currently {shop_data['payment_reliability']:.1f}%)")
+    if shop_data['avg_profit_margin'] < 15:
+        report['weaknesses'].append(f"Low profit margins (currently {shop_data['avg_profit_margin']:.1f}%)")
+    if shop_data['profit_trend'] < 0:
+        report['weaknesses'].append(f"Declining profits (trend: {shop_data['profit_trend']:.1f}%)")
+    if shop_data['monthly_loss_count'] >= 2:
+        report['weaknesses'].append(f"Multiple loss months ({shop_data['monthly_loss_count']}/6 months)")
+
+    # Generate recommendations
+    if shop_data['payment_reliability'] < 90:
+        report['recommendations'].append("Improve payment reliability by prioritizing on-time payments")
+    if shop_data['avg_expense_ratio'] > 80:
+        report['recommendations'].append(f"Reduce expenses (currently {shop_data['avg_expense_ratio']:.1f}% of revenue)")
+    if shop_data['profit_trend'] < 5:
+        report['recommendations'].append("Develop strategies to improve profit growth")
+    if shop_data['monthly_loss_count'] > 0:
+        report['recommendations'].append("Analyze loss months to prevent recurrence")
+
+    # Business-type specific recommendations
+    if shop_data['business_type'] == 'Retail':
+        report['recommendations'].append("Optimize inventory to reduce holding costs")
+    elif shop_data['business_type'] == 'Service':
+        report['recommendations'].append("Focus on customer retention for steady income")
+    elif shop_data['business_type'] == 'Agriculture':
+        report['recommendations'].append("Explore seasonal diversification opportunities")
+
+    return report
+
+class CreditReportService:
+    """Credit reports for a scored portfolio, indexed by shopkeeper_id
+
+    Both frames are indexed once up front: the aggregated frame becomes a
+    dict of row dicts and the monthly ledger a map from shopkeeper_id to
+    row positions. Each report is then a dictionary lookup instead of two
+    boolean masks over the full frames. Trend charts go through a
+    ChartRenderer, so they are rendered off-thread and only when the
+    shop's data changed.
+    """
+
+    def __init__(self, aggregated_df, df, plot_dir='.', renderer=None):
+        self.df = df
+        self.plot_dir = plot_dir
+        # Chart workers only write files, so the directory must exist first
+        os.makedirs(plot_dir, exist_ok=True)
+        self._renderer = renderer
+        self.shops = {
+            int(shop['shopkeeper_id']): shop
+            for shop in aggregated_df.to_dict('records')
+        }
+        self.raw_positions = df.groupby('shopkeeper_id', sort=False, observed=True).indices
+
+    def shopkeeper_ids(self):
+        return list(self.shops)
+
+    def raw_data(self, shopkeeper_id):
+        """Monthly ledger rows of one shop in month order"""
+        return self.df.iloc[self.raw_positions[shopkeeper_id]].sort_values('month', kind='mergesort')
+
+    def plot_path(self, shopkeeper_id):
+        return os.path.join(self.plot_dir, f'shopkeeper_{shopkeeper_id}_trends.png')
+
+    @property
+    def renderer(self):
+        # Resolved lazily so worker processes get a renderer of their own
+        return self._renderer or get_renderer()
+
+    def submit_plot(self, shopkeeper_id):
+        """Start rendering a shop's trend chart; returns a future for its path"""
+        shopkeeper_id = int(shopkeeper_id)
+        name = self.shops[shopkeeper_id]['name']
+        return self.renderer.trends(name, self.raw_data(shopkeeper_id), self.plot_path(shopkeeper_id))
+
+    def report(self, shopkeeper_id, plot=True):
+        """Report for one shop; raises KeyError for an unknown shopkeeper_id"""
+        report = build_report(self.shops[int(shopkeeper_id)])
+        if plot:
+            self.submit_plot(shopkeeper_id).result()
+        return report
+
+    def reports(self, shopkeeper_ids=None, plot=False, processes=1):
+        """Reports for many shops (all by default), in the order given
+
+        With ``processes`` > 1 the shops are split into chunks and spread
+        over a process pool; that mainly pays off when plots are rendered.
+        Either way all charts are queued before waiting on any of them.
+        """
+        if shopkeeper_ids is None:
+            shopkeeper_ids = self.shopkeeper_ids()
+        shopkeeper_ids = [int(shopkeeper_id) for shopkeeper_id in shopkeeper_ids]
+        if processes is None or processes <= 1 or len(shopkeeper_ids) <= REPORT_CHUNK_SIZE:
+            return self._reports(shopkeeper_ids, plot)
+
+        chunks = [shopkeeper_ids[start:start + REPORT_CHUNK_SIZE]
+                  for start in range(0, len(shopkeeper_ids), REPORT_CHUNK_SIZE)]
+        with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker, initargs=(self,)) as pool:
+            results = pool.map(_worker_reports, chunks, [plot] * len(chunks))
+            return [report for chunk in results for report in chunk]
+
+    def _reports(self, shopkeeper_ids, plot):
+        reports = [self.report(shopkeeper_id, plot=False) for shopkeeper_id in shopkeeper_ids]
+        if plot:
+            for future in [self.submit_plot(shopkeeper_id) for shopkeeper_id in shopkeeper_ids]:
+                future.result()
+        return reports
+
+# Service held by each worker process, set once by the pool initializer
+_worker_service = None
+
+def _init_worker(service):
+    global _worker_service
+    _worker_service = service
+
+def _worker_reports(shopkeeper_ids, plot):
+    return _worker_service._reports(shopkeeper_ids, plot)
+
+if __name__ == '__main__':
+    from aggregation import aggregate_shopkeeper_data
+    from scoring import pipeline_credit_scores
+    from ingest import load_ledger
+    from feature_store import FeatureStore
+
+    parser = argparse.ArgumentParser(description='Generate credit reports for the whole portfolio')
+    parser.add_argument('--data', default='bizsathi_1000_shopkeepers.csv')
+    parser.add_argument('--output', default='credit_reports.json')
+    parser.add_argument('--plots', action='store_true', help='Also render a trend chart per shop')
+    parser.add_argument('--plot-dir', default='.')
+    parser.add_argument('--processes', type=int, default=os.cpu_count())
+    parser.add_argument('--feature-store', help='Read aggregated features from this feature store')
+    args = parser.parse_args()
+
+    ledger = load_ledger(args.data)
+    if args.feature_store:
+        store = FeatureStore(args.feature_store)
+        aggregated = store.features()
+        store.close()
+    else:
+        aggregated = aggregate_shopkeeper_data(ledger)
+    aggregated['credit_score'], aggregated['risk_category'] = pipeline_credit_scores(aggregated)
+
+    service = CreditReportService(aggregated, ledger, plot_dir=args.plot_dir)
+    all_reports = service.reports(plot=args.plots, processes=args.processes)
+    with open(args.output, 'w') as f:
+        json.dump(all_reports, f, indent=2)
+    print(f"Wrote {len(all_reports)} credit reports to {args.output}")
@@ -0,0 +1,189 @@
+import sqlite3
+import threading
+import argparse
+from datetime import datetime
+import pandas as pd
+from aggregation import AGGREGATED_COLUMNS
+from ingest import load_ledger, to_month_categorical
+from incremental_stats import SUM_COLUMNS, FIRST_COLUMNS, derive_metrics, month_contributions
+
+# Default location of the persistent feature store, relative to Model/
+FEATURE_STORE_PATH = 'feature_store.sqlite'
+
+FEATURE_COLUMNS = AGGREGATED_COLUMNS[3:]
+INTEGER_FEATURES = ['on_time_payments', 'missed_payments', 'days_active', 'monthly_loss_count']
+
+# last_month is the calendar position (0 = January) of the latest month folded in
+STORE_COLUMNS = ['shopkeeper_id', 'name', 'business_type'] + SUM_COLUMNS + FIRST_COLUMNS + FEATURE_COLUMNS + \
+    ['last_month', 'updated_at']
+
+class MonthOrderError(ValueError):
+    """Raised when appended months repeat or precede a shopkeeper's stored months"""
+
+def features_from_sums(sums):
+    """Derive aggregate_shopkeeper_data features from a frame of running sums"""
+    return pd.DataFrame(derive_metrics(sums), index=sums.index)
+
+class FeatureStore:
+    """Persistent per-shopkeeper features backed by SQLite
+
+    Each row holds a shopkeeper's aggregate_shopkeeper_data features together
+    with the running sums they were derived from. Appending a month touches
+    only the shopkeepers it mentions, and reads are primary-key lookups.
+    Months must arrive in calendar order: a month at or before a shop's last
+    stored month is rejected, so re-sending rows cannot count them twice.
+    One connection is shared between threads, so every call holds a lock.
+    """
+
+    def __init__(self, path=FEATURE_STORE_PATH):
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.RLock()
+        self._create_table()
+
+    def _create_table(self):
+        column_types = {'shopkeeper_id': 'INTEGER PRIMARY KEY', 'name': 'TEXT', 'business_type': 'TEXT',
+                        'last_month': 'INTEGER', 'updated_at': 'TEXT'}
+        columns = ', '.join(f"{column} {column_types.get(column, 'REAL')}" for column in STORE_COLUMNS)
+        self.conn.execute(f'CREATE TABLE IF NOT EXISTS shopkeeper_features ({columns})')
+        # Stores written before last_month existed get the column, empty until rebuilt
+        existing = {row[1] for row in self.conn.execute('PRAGMA table_info(shopkeeper_features)')}
+        if 'last_month' not in existing:
+            self.conn.execute('ALTER TABLE shopkeeper_features ADD COLUMN last_month INTEGER')
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def _read(self, shopkeeper_ids=None):
+        query = f"SELECT {', '.join(STORE_COLUMNS)} FROM shopkeeper_features"
+        if shopkeeper_ids is None:
+            rows = self.conn.execute(query + ' ORDER BY shopkeeper_id').fetchall()
+        else:
+            rows = []
+            ids = [int(shopkeeper_id) for shopkeeper_id in shopkeeper_ids]
+            # Stay under SQLite's bound-parameter limit
+            for start in range(0, len(ids), 500):
+                batch = ids[start:start + 500]
+                placeholders = ', '.join('?' * len(batch))
+                rows.extend(self.conn.execute(f'{query} WHERE shopkeeper_id IN ({placeholders})', batch).fetchall())
+        frame = pd.DataFrame(rows, columns=STORE_COLUMNS)
+        numeric = SUM_COLUMNS + FIRST_COLUMNS + FEATURE_COLUMNS + ['last_month']
+        frame[numeric] = frame[numeric].astype(float)
+        return frame.set_index('shopkeeper_id', drop=False)
+
+    def _write(self, frame):
+        frame = frame.astype(object).where(frame.notna(), None)
+        placeholders = ', '.join('?' * len(STORE_COLUMNS))
+        self.conn.executemany(
+            f"INSERT OR REPLACE INTO shopkeeper_features ({', '.join(STORE_COLUMNS)}) VALUES ({placeholders})",
+            frame[STORE_COLUMNS].itertuples(index=False, name=None)
+        )
+        self.conn.commit()
+
+    def _check_months(self, df, existing):
+        """Raise MonthOrderError unless every row is a new, later month for its shop"""
+        codes = df['month'].cat.codes
+        repeated = df.loc[pd.DataFrame({'id': df['shopkeeper_id'], 'month': codes}).duplicated(), 'shopkeeper_id']
+        if len(repeated):
+            raise MonthOrderError(f"Months repeated within the upload for shopkeepers {sorted(set(repeated.tolist()))[:5]}")
+        first_new = codes.groupby(df['shopkeeper_id'].to_numpy()).min()
+        last_stored = existing['last_month'].reindex(first_new.index)
+        stale = first_new.index[first_new <= last_stored]
+        if len(stale):
+            raise MonthOrderError(
+                f"Months at or before the last stored month for shopkeepers {sorted(stale.tolist())[:5]}"
+            )
+
+    def _fold(self, df, existing):
+        """Fold monthly rows into existing running sums and derive features"""
+        base_months = existing['months'] if len(existing) else None
+        df, position, contributions = month_contributions(df, base_months)
+        delta = contributions.groupby('shopkeeper_id', sort=True).sum()
+
+        sums = existing[SUM_COLUMNS].reindex(delta.index, fill_value=0).add(delta[SUM_COLUMNS])
+        first_new = df.loc[position == 0].set_index('shopkeeper_id')
+        identity = existing[['name', 'business_type'] + FIRST_COLUMNS].reindex(delta.index)
+        identity['name'] = identity['name'].fillna(first_new['name'])
+        identity['business_type'] = identity['business_type'].fillna(first_new['business_type'])
+        identity['first_profit'] = identity['first_profit'].fillna(first_new['profit'])
+        identity['first_revenue'] = identity['first_revenue'].fillna(first_new['revenue'])
+
+        frame = pd.concat([identity, sums], axis=1)
+        frame = pd.concat([frame, features_from_sums(frame)], axis=1)
+        last_new = df['month'].cat.codes.groupby(df['shopkeeper_id'].to_numpy()).max()
+        frame['last_month'] = pd.concat([existing['last_month'].reindex(delta.index), last_new], axis=1).max(axis=1)
+        frame['shopkeeper_id'] = frame.index
+        frame['updated_at'] = datetime.now().isoformat()
+        return frame
+
+    def rebuild(self, df):
+        """Replace the whole store with features built from a full ledger frame"""
+        with self._lock:
+            self.conn.execute('DELETE FROM shopkeeper_features')
+            frame = self._fold(df.assign(month=to_month_categorical(df['month'])), self._read([]))
+            self._write(frame)
+            return len(frame)
+
+    def append_months(self, df):
+        """Fold newly arrived monthly rows into the store
+
+        Only shopkeepers that appear in ``df`` are read, recomputed and
+        written back. Returns their ids. Raises MonthOrderError, and stores
+        nothing, if any row repeats a month or is not later than its shop's
+        last stored month.
+        """
+        df = df.assign(month=to_month_categorical(df['month']))
+        shopkeeper_ids = df['shopkeeper_id'].unique().tolist()
+        with self._lock:
+            existing = self._read(shopkeeper_ids)
+            self._check_months(df, existing)
+            frame = self._fold(df, existing)
+            self._write(frame)
+        return shopkeeper_ids
+
+    def fingerprint(self):
+        """(row count, latest update) of the store, which changes on every write"""
+        with self._lock:
+            return self.conn.execute('SELECT COUNT(*), MAX(updated_at) FROM shopkeeper_features').fetchone()
+
+    def get(self, shopkeeper_id):
+        """Features for one shopkeeper as a dict, or None if unknown"""
+        with self._lock:
+            row = self.conn.execute(
+                f"SELECT {', '.join(AGGREGATED_COLUMNS)} FROM shopkeeper_features WHERE shopkeeper_id = ?",
+                (int(shopkeeper_id),)
+            ).fetchone()
+        if row is None:
+            return None
+        features = dict(zip(AGGREGATED_COLUMNS, row))
+        for column in INTEGER_FEATURES:
+            features[column] = int(features[column])
+        return features
+
+    def features(self, shopkeeper_ids=None):
+        """aggregate_shopkeeper_data-shaped frame for some or all shopkeepers"""
+        with self._lock:
+            frame = self._read(shopkeeper_ids).reset_index(drop=True)
+        for column in INTEGER_FEATURES:
+            frame[column] = frame[column].astype('int64')
+        frame['shopkeeper_id'] = frame['shopkeeper_id'].astype('int64')
+        return frame[AGGREGATED_COLUMNS]
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build or update the shopkeeper feature store')
+    parser.add_argument('command', choices=['rebuild', 'append'])
+    parser.add_argument('csv_path', help='Monthly ledger CSV in the bizsathi schema')
+    parser.add_argument('--store', default=FEATURE_STORE_PATH)
+    args = parser.parse_args()
+
+    store = FeatureStore(args.store)
+    ledger = load_ledger(args.csv_path)
+    if args.command == 'rebuild':
+        print(f"Stored features for {store.rebuild(ledger)} shopkeepers in {args.store}")
+    else:
+        try:
+            print(f"Updated features for {len(store.append_months(ledger))} shopkeepers in {args.store}")
+        except MonthOrderError as e:
+            parser.exit(1, f"Nothing appended: {e}\n")
+    store.close()
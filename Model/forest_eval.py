@@ -0,0 +1,126 @@
+import os
+import json
+import numpy as np
+
+# Array files making up an exported forest
+ARRAY_NAMES = ['feature', 'threshold', 'left', 'right', 'missing_left', 'value', 'roots']
+HEADER_FILE = 'forest.json'
+
+class FlatForest:
+    """Tree ensemble flattened into contiguous NumPy node arrays
+
+    All trees share one set of node arrays; ``roots`` holds the offset of
+    each tree's root node. Leaves point at themselves with a threshold of
+    +inf, so every row can be walked a fixed ``max_depth`` steps without
+    checking for leaves. Predictions average the leaf values of all trees in
+    the same order as sklearn, so results are identical to
+    ``RandomForestRegressor.predict``.
+    """
+
+    def __init__(self, feature, threshold, left, right, missing_left, value, roots, max_depth, n_features):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.missing_left = missing_left
+        self.value = value
+        self.roots = roots
+        self.max_depth = max_depth
+        self.n_features = n_features
+        self.has_missing = bool(np.any(missing_left))
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @classmethod
+    def from_sklearn(cls, model):
+        """Flatten a fitted single-output forest or decision tree regressor"""
+        estimators = getattr(model, 'estimators_', None)
+        if estimators is None:
+            estimators = [model]
+        trees = [estimator.tree_ for estimator in estimators]
+        if any(tree.n_outputs != 1 for tree in trees):
+            raise ValueError('Only single-output regressors can be flattened')
+
+        features, thresholds, lefts, rights, missing, values, roots = [], [], [], [], [], [], []
+        offset = 0
+        for tree in trees:
+            node_ids = np.arange(tree.node_count)
+            is_leaf = tree.children_left == -1
+
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+            lefts.append(np.where(is_leaf, node_ids, tree.children_left) + offset)
+            rights.append(np.where(is_leaf, node_ids, tree.children_right) + offset)
+            go_left = getattr(tree, 'missing_go_to_left', None)
+            missing.append(np.zeros(tree.node_count, dtype=bool) if go_left is None
+                           else np.asarray(go_left, dtype=bool) & ~is_leaf)
+            values.append(tree.value[:, 0, 0])
+            roots.append(offset)
+            offset += tree.node_count
+
+        return cls(
+            feature=np.ascontiguousarray(np.concatenate(features), dtype=np.intp),
+            threshold=np.ascontiguousarray(np.concatenate(thresholds), dtype=np.float64),
+            left=np.ascontiguousarray(np.concatenate(lefts), dtype=np.intp),
+            right=np.ascontiguousarray(np.concatenate(rights), dtype=np.intp),
+            missing_left=np.ascontiguousarray(np.concatenate(missing)),
+            value=np.ascontiguousarray(np.concatenate(values), dtype=np.float64),
+            roots=np.asarray(roots, dtype=np.intp),
+            max_depth=max(tree.max_depth for tree in trees),
+            n_features=trees[0].n_features
+        )
+
+    def predict(self, X):
+        """Predict for a 2-D array of rows (a single row is a 1-row array)"""
+        # sklearn compares float32 inputs against float64 thresholds
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(f'Expected rows with {self.n_features} features')
+
+        # Walk every (row, tree) pair one level per step using flat indexing
+        flat_X = X.ravel()
+        row_offsets = (np.arange(X.shape[0]) * self.n_features)[:, None]
+        nodes = np.broadcast_to(self.roots, (X.shape[0], self.n_trees))
+        for _ in range(self.max_depth):
+            values = np.take(flat_X, row_offsets + np.take(self.feature, nodes))
+            go_left = values <= np.take(self.threshold, nodes)
+            if self.has_missing:
+                go_left |= np.isnan(values) & np.take(self.missing_left, nodes)
+            nodes = np.where(go_left, np.take(self.left, nodes), np.take(self.right, nodes))
+
+        # Sum tree by tree, as sklearn does, so results match bit for bit
+        leaf_values = np.take(self.value, nodes)
+        total = np.zeros(X.shape[0])
+        for tree in range(self.n_trees):
+            total += leaf_values[:, tree]
+        return total / self.n_trees
+
+    def save(self, directory):
+        """Write the node arrays as .npy files that can be memory-mapped"""
+        os.makedirs(directory, exist_ok=True)
+        for name in ARRAY_NAMES:
+            np.save(os.path.join(directory, f'{name}.npy'), getattr(self, name))
+        with open(os.path.join(directory, HEADER_FILE), 'w') as f:
+            json.dump({'max_depth': int(self.max_depth), 'n_features': int(self.n_features)}, f)
+
+    @classmethod
+    def load(cls, directory, mmap=True):
+        """Load an exported forest, memory-mapping its arrays by default"""
+        with open(os.path.join(directory, HEADER_FILE)) as f:
+            header = json.load(f)
+        arrays = {
+            name: np.load(os.path.join(directory, f'{name}.npy'), mmap_mode='r' if mmap else None)
+            for name in ARRAY_NAMES
+        }
+        return cls(max_depth=header['max_depth'], n_features=header['n_features'], **arrays)
+
+def compile_model(model):
+    """Flattened evaluator for a supported model, or None if it cannot be flattened"""
+    if isinstance(model, FlatForest):
+        return model
+    try:
+        return FlatForest.from_sklearn(model)
+    except (AttributeError, ValueError):
+        return None
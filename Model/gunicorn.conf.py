@@ -0,0 +1,107 @@
+"""Production pre-fork server settings for the credit scoring APIs
+
+    gunicorn -c gunicorn.conf.py credit_api:app
+    gunicorn -c gunicorn.conf.py credit_api_simple:app
+
+The app module is imported once in the master process and, for credit_api,
+the current model is loaded there before any worker is forked, so every
+worker shares the same model pages copy-on-write instead of loading its
+own copy. Settings come from the environment:
+
+    CREDIT_API_BIND         address to listen on (default 0.0.0.0:5000)
+    CREDIT_API_WORKERS      worker processes (default 2 x CPUs + 1)
+    CREDIT_API_THREADS      threads per worker (default 4)
+    CREDIT_API_MODEL_POLL   seconds between checks for a new current model
+                            version; 0 disables the check (default 10)
+    CREDIT_API_METRICS_DIR  directory where workers share their /metrics
+                            counts (default: a fresh temporary directory)
+
+When the current version in the model store changes (for example after
+POST /train_model), or on `kill -HUP <master pid>`, the master loads the
+new model and replaces the workers gracefully: new workers start with the
+new model while the old ones finish their in-flight requests.
+
+State that must outlive a worker is kept outside it: training jobs are
+JSON files under models/jobs, so any worker can report on a job and
+reloads do not lose it, and each worker writes its metrics to the metrics
+directory, so /metrics on any worker reports totals for the whole server.
+"""
+import os
+import gc
+import sys
+import time
+import glob
+import shutil
+import signal
+import tempfile
+import threading
+
+bind = os.environ.get('CREDIT_API_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('CREDIT_API_WORKERS', (os.cpu_count() or 1) * 2 + 1))
+threads = int(os.environ.get('CREDIT_API_THREADS', 4))
+model_poll_seconds = float(os.environ.get('CREDIT_API_MODEL_POLL', 10))
+
+# Set before the app is imported, which reads it when creating its registry.
+# This file is read again on every reload, so remember in the environment
+# whether the directory is ours to delete
+if 'CREDIT_API_METRICS_DIR' not in os.environ:
+    os.environ['CREDIT_API_METRICS_DIR'] = tempfile.mkdtemp(prefix='credit-api-metrics-')
+    os.environ['CREDIT_API_METRICS_DIR_TEMPORARY'] = '1'
+metrics_dir = os.environ['CREDIT_API_METRICS_DIR']
+
+# Import the app in the master so workers inherit it
+preload_app = True
+timeout = 60
+graceful_timeout = 30
+
+def _scoring_service():
+    """The credit_api module when it is the app being served"""
+    return sys.modules.get('credit_api')
+
+def _load_shared_model(server):
+    service = _scoring_service()
+    if service is None:
+        return
+    # Unfrozen so the previous model can be garbage collected
+    gc.unfreeze()
+    service.load_model()
+    # Keep the collector from writing to inherited objects in the workers,
+    # which would turn shared pages into private copies
+    gc.freeze()
+    server.log.info(f"Loaded model version {service.model_version} for the workers")
+
+def _watch_model_version(server):
+    service = _scoring_service()
+    signalled = None
+    while True:
+        time.sleep(model_poll_seconds)
+        try:
+            current = service.model_store.current_version()
+        except Exception as e:
+            server.log.warning(f"Could not read the current model version: {e}")
+            continue
+        if current is not None and current != service.model_version and current != signalled:
+            server.log.info(f"Model version {current} is now current, reloading workers")
+            signalled = current
+            os.kill(server.pid, signal.SIGHUP)
+
+def when_ready(server):
+    # Counts left by a previous server run would be added to this one's
+    for stale in glob.glob(os.path.join(metrics_dir, '*.json')):
+        os.remove(stale)
+    _load_shared_model(server)
+    if _scoring_service() is not None and model_poll_seconds > 0:
+        threading.Thread(target=_watch_model_version, args=(server,), daemon=True).start()
+
+def on_reload(server):
+    _load_shared_model(server)
+
+def worker_exit(server, worker):
+    # Keep the counts this worker collected since its last periodic write
+    service = _scoring_service()
+    if service is not None:
+        service.metrics_registry.flush()
+
+def on_exit(server):
+    if os.environ.get('CREDIT_API_METRICS_DIR_TEMPORARY'):
+        shutil.rmtree(metrics_dir, ignore_errors=True)
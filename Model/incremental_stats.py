@@ -0,0 +1,145 @@
+import numpy as np
+import pandas as pd
+from aggregation import relative_trend
+
+# Sufficient statistics per shopkeeper. x is a month's 0-based position in
+# the shop's history, so sum(x) and sum(x^2) follow from the month count and
+# only the cross-products with profit and revenue need to be kept.
+SUM_COLUMNS = [
+    'months', 'sum_transactions', 'sum_on_time_payments', 'sum_missed_payments',
+    'sum_avg_transaction_amount', 'sum_days_active', 'sum_profit', 'sum_revenue',
+    'loss_months', 'sum_profit_margin', 'profit_margin_count',
+    'sum_expense_ratio', 'expense_ratio_count', 'sum_x_profit', 'sum_x_revenue'
+]
+FIRST_COLUMNS = ['first_profit', 'first_revenue']
+
+def _ratio(numerator, denominator):
+    """Division with pandas semantics: x/0 is +-inf and 0/0 is NaN"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.divide(np.asarray(numerator, dtype=float), np.asarray(denominator, dtype=float))
+
+def derive_metrics(sums):
+    """aggregate_shopkeeper_data metrics from sufficient statistics
+
+    ``sums`` maps every SUM_COLUMNS and FIRST_COLUMNS name to a scalar or an
+    array, so the same formulas serve a single shop and a whole frame.
+    """
+    months = np.asarray(sums['months'], dtype=float)
+
+    # Least-squares slope against positions 0..n-1
+    x_mean = (months - 1) / 2
+    sxx = months * (months * months - 1) / 12
+    has_slope = sxx != 0
+    safe_sxx = np.where(has_slope, sxx, 1.0)
+    profit_slope = np.where(has_slope, (np.asarray(sums['sum_x_profit']) - x_mean * sums['sum_profit']) / safe_sxx, 0.0)
+    revenue_slope = np.where(has_slope, (np.asarray(sums['sum_x_revenue']) - x_mean * sums['sum_revenue']) / safe_sxx, 0.0)
+
+    # Ratio means skip undefined (0/0) months, like pandas mean()
+    margin_count = np.asarray(sums['profit_margin_count'], dtype=float)
+    expense_count = np.asarray(sums['expense_ratio_count'], dtype=float)
+
+    return {
+        'transactions_per_month': _ratio(sums['sum_transactions'], months),
+        'on_time_payments': np.asarray(sums['sum_on_time_payments']),
+        'missed_payments': np.asarray(sums['sum_missed_payments']),
+        'avg_transaction_amount': _ratio(sums['sum_avg_transaction_amount'], months),
+        'days_active': np.asarray(sums['sum_days_active']),
+        'monthly_profit_avg': _ratio(sums['sum_profit'], months),
+        'monthly_revenue_avg': _ratio(sums['sum_revenue'], months),
+        'monthly_loss_count': np.asarray(sums['loss_months']),
+        'avg_profit_margin': _ratio(sums['sum_profit_margin'], np.where(margin_count > 0, margin_count, np.nan)) * 100,
+        'avg_expense_ratio': _ratio(sums['sum_expense_ratio'], np.where(expense_count > 0, expense_count, np.nan)) * 100,
+        'payment_reliability': _ratio(sums['sum_on_time_payments'], sums['sum_transactions']) * 100,
+        'profit_trend': relative_trend(profit_slope, months, sums['first_profit']),
+        'revenue_trend': relative_trend(revenue_slope, months, sums['first_revenue'])
+    }
+
+def month_contributions(df, base_months=None):
+    """Per-row contributions to the sufficient statistics, vectorized
+
+    Rows are ordered the same way as aggregate_shopkeeper_data. Returns the
+    sorted frame, each row's position and the contributions frame;
+    ``base_months`` maps shopkeeper_id to months already folded in, so
+    positions continue from where each shop's history left off.
+    """
+    df = df.sort_values(['shopkeeper_id', 'month'], kind='mergesort').reset_index(drop=True)
+    position = df.groupby('shopkeeper_id', sort=False).cumcount()
+    if base_months is not None:
+        position = position + df['shopkeeper_id'].map(base_months).fillna(0).astype('int64')
+
+    profit_margin = df['profit'] / df['revenue']
+    expense_ratio = df['expenses'] / df['revenue']
+    contributions = pd.DataFrame({
+        'shopkeeper_id': df['shopkeeper_id'],
+        'months': 1,
+        'sum_transactions': df['transactions'].astype('int64'),
+        'sum_on_time_payments': df['on_time_payments'].astype('int64'),
+        'sum_missed_payments': df['missed_payments'].astype('int64'),
+        'sum_avg_transaction_amount': df['avg_transaction_amount'],
+        'sum_days_active': df['days_active'].astype('int64'),
+        'sum_profit': df['profit'],
+        'sum_revenue': df['revenue'],
+        'loss_months': (df['profit'] < 0).astype('int64'),
+        'sum_profit_margin': profit_margin.fillna(0),
+        'profit_margin_count': profit_margin.notna().astype('int64'),
+        'sum_expense_ratio': expense_ratio.fillna(0),
+        'expense_ratio_count': expense_ratio.notna().astype('int64'),
+        'sum_x_profit': position * df['profit'],
+        'sum_x_revenue': position * df['revenue']
+    })
+    return df, position, contributions
+
+class ShopkeeperStats:
+    """Sufficient statistics for one shopkeeper, updated a month at a time
+
+    add_month() folds in the next month in constant time, and metrics()
+    returns exactly what aggregate_shopkeeper_data would compute over all
+    months seen so far (in the order they were added).
+    """
+
+    __slots__ = SUM_COLUMNS + FIRST_COLUMNS
+
+    def __init__(self, **sums):
+        for name in SUM_COLUMNS:
+            setattr(self, name, sums.get(name, 0))
+        for name in FIRST_COLUMNS:
+            setattr(self, name, sums.get(name, np.nan))
+
+    def add_month(self, record):
+        """Fold one monthly ledger record into the statistics"""
+        x = self.months
+        profit = float(record['profit'])
+        revenue = float(record['revenue'])
+        if x == 0:
+            self.first_profit = profit
+            self.first_revenue = revenue
+
+        self.months += 1
+        # Python numbers, so the compact schema's int8/int16 counts cannot overflow
+        self.sum_transactions += int(record['transactions'])
+        self.sum_on_time_payments += int(record['on_time_payments'])
+        self.sum_missed_payments += int(record['missed_payments'])
+        self.sum_avg_transaction_amount += float(record['avg_transaction_amount'])
+        self.sum_days_active += int(record['days_active'])
+        self.sum_profit += profit
+        self.sum_revenue += revenue
+        self.loss_months += int(profit < 0)
+        self.sum_x_profit += x * profit
+        self.sum_x_revenue += x * revenue
+
+        profit_margin = float(_ratio(profit, revenue))
+        if not np.isnan(profit_margin):
+            self.sum_profit_margin += profit_margin
+            self.profit_margin_count += 1
+        expense_ratio = float(_ratio(float(record['expenses']), revenue))
+        if not np.isnan(expense_ratio):
+            self.sum_expense_ratio += expense_ratio
+            self.expense_ratio_count += 1
+        return self
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def metrics(self):
+        """Derived metrics as plain Python numbers"""
+        return {name: value.item() for name, value in derive_metrics(self.to_dict()).items()}
@@ -0,0 +1,219 @@
+import argparse
+import pandas as pd
+import numpy as np
+from aggregation import AGGREGATED_COLUMNS
+from incremental_stats import derive_metrics
+
+# Column types of the bizsathi monthly ledger schema
+LEDGER_DTYPES = {
+    'shopkeeper_id': 'int64',
+    'name': 'object',
+    'business_type': 'object',
+    'month': 'object',
+    'transactions': 'int64',
+    'on_time_payments': 'int64',
+    'missed_payments': 'int64',
+    'avg_transaction_amount': 'float64',
+    'revenue': 'float64',
+    'expenses': 'float64',
+    'profit': 'float64',
+    'days_active': 'int64'
+}
+
+# Calendar order of the month column
+MONTHS = [
+    'January', 'February', 'March', 'April', 'May', 'June',
+    'July', 'August', 'September', 'October', 'November', 'December'
+]
+MONTH_DTYPE = pd.CategoricalDtype(MONTHS, ordered=True)
+
+# Repeated strings stored once per distinct value
+CATEGORICAL_COLUMNS = ['name', 'business_type']
+
+# Counts are downcast to the smallest integer type that holds them. Money
+# columns stay float64: float32 cannot hold amounts above ~100k NPR to the
+# paisa and would change the aggregates.
+COUNT_COLUMNS = ['shopkeeper_id', 'transactions', 'on_time_payments', 'missed_payments', 'days_active']
+
+DEFAULT_CHUNKSIZE = 100000
+
+# Order-independent sums kept per (shopkeeper, month) bucket
+BUCKET_SUMS = [
+    'rows', 'sum_transactions', 'sum_on_time_payments', 'sum_missed_payments',
+    'sum_avg_transaction_amount', 'sum_days_active', 'sum_profit', 'sum_revenue',
+    'loss_months', 'sum_profit_margin', 'profit_margin_count',
+    'sum_expense_ratio', 'expense_ratio_count',
+    # sum of (order within bucket * value), for the trend cross-products
+    'sum_i_profit', 'sum_i_revenue'
+]
+
+INTEGER_COLUMNS = ['on_time_payments', 'missed_payments', 'days_active', 'monthly_loss_count']
+
+def read_ledger(path, **kwargs):
+    """Read a ledger CSV with the explicit bizsathi dtype schema"""
+    return pd.read_csv(path, dtype=LEDGER_DTYPES, **kwargs)
+
+def to_month_categorical(months):
+    """Convert month names to the ordered calendar categorical
+
+    Sorting the result follows the calendar rather than the alphabet. Names
+    outside MONTHS raise ValueError instead of silently becoming NaN.
+    """
+    converted = months.astype(MONTH_DTYPE)
+    unknown = converted.isna() & months.notna()
+    if unknown.any():
+        raise ValueError(f"Unknown month names: {sorted(months[unknown].astype(str).unique())[:5]}")
+    return converted
+
+def compact_ledger(df):
+    """Compact in-memory form of a ledger frame
+
+    name and business_type become categoricals, month becomes the ordered
+    calendar categorical and count columns are downcast.
+    """
+    df = df.copy()
+    for column in CATEGORICAL_COLUMNS:
+        df[column] = df[column].astype('category')
+    df['month'] = to_month_categorical(df['month'])
+    for column in COUNT_COLUMNS:
+        df[column] = pd.to_numeric(df[column], downcast='integer')
+    return df
+
+def load_ledger(path):
+    """Load a ledger CSV into the compact typed schema"""
+    return compact_ledger(read_ledger(path))
+
+def memory_report(path):
+    """Per-column memory of a ledger CSV before and after compaction
+
+    Compares a plain read_csv load with load_ledger. Bytes are measured
+    deep, so string payloads are counted; the last row holds the totals.
+    """
+    plain = pd.read_csv(path)
+    compact = load_ledger(path)
+    report = pd.DataFrame({
+        'dtype_before': plain.dtypes.astype(str),
+        'bytes_before': plain.memory_usage(deep=True, index=False),
+        'dtype_after': compact.dtypes.astype(str),
+        'bytes_after': compact.memory_usage(deep=True, index=False)
+    })
+    report.loc['total'] = ['', report['bytes_before'].sum(), '', report['bytes_after'].sum()]
+    report['reduction'] = 1 - report['bytes_after'].astype(float) / report['bytes_before'].astype(float)
+    return report
+
+def _bucket_partials(chunk, seen_rows):
+    """Reduce one chunk to per-(shopkeeper, month) partial aggregates
+
+    ``seen_rows`` gives the rows each bucket already holds from earlier
+    chunks (None for the first chunk), so each row knows its order within
+    its bucket across the file.
+    """
+    offset = 0
+    if seen_rows is not None:
+        keys = pd.MultiIndex.from_arrays([chunk['shopkeeper_id'], chunk['month']])
+        offset = seen_rows.reindex(keys, fill_value=0).to_numpy().astype('int64')
+    order = chunk.groupby(['shopkeeper_id', 'month'], sort=False, observed=True).cumcount().to_numpy() + offset
+
+    profit_margin = chunk['profit'] / chunk['revenue']
+    expense_ratio = chunk['expenses'] / chunk['revenue']
+    rows = pd.DataFrame({
+        'shopkeeper_id': chunk['shopkeeper_id'],
+        'month': chunk['month'],
+        'rows': 1,
+        'sum_transactions': chunk['transactions'],
+        'sum_on_time_payments': chunk['on_time_payments'],
+        'sum_missed_payments': chunk['missed_payments'],
+        'sum_avg_transaction_amount': chunk['avg_transaction_amount'],
+        'sum_days_active': chunk['days_active'],
+        'sum_profit': chunk['profit'],
+        'sum_revenue': chunk['revenue'],
+        'loss_months': (chunk['profit'] < 0).astype('int64'),
+        'sum_profit_margin': profit_margin.fillna(0),
+        'profit_margin_count': profit_margin.notna().astype('int64'),
+        'sum_expense_ratio': expense_ratio.fillna(0),
+        'expense_ratio_count': expense_ratio.notna().astype('int64'),
+        'sum_i_profit': order * chunk['profit'],
+        'sum_i_revenue': order * chunk['revenue']
+    })
+    sums = rows.groupby(['shopkeeper_id', 'month'], sort=False, observed=True)[BUCKET_SUMS].sum()
+
+    # First row of a bucket across the whole file
+    firsts = chunk.loc[order == 0, ['shopkeeper_id', 'month', 'name', 'business_type', 'profit', 'revenue']]
+    firsts = firsts.rename(columns={'profit': 'first_profit', 'revenue': 'first_revenue'})
+    firsts = firsts.set_index(['shopkeeper_id', 'month'])
+    return sums, firsts
+
+def _finalize(sums, firsts):
+    """Turn per-bucket partials into aggregate_shopkeeper_data output"""
+    buckets = sums.join(firsts).reset_index()
+    # Calendar month order, as aggregate_shopkeeper_data on load_ledger
+    buckets = buckets.sort_values(['shopkeeper_id', 'month'], kind='mergesort').reset_index(drop=True)
+
+    # Position of each bucket's first row within its shop's history
+    start = buckets.groupby('shopkeeper_id', sort=False)['rows'].cumsum() - buckets['rows']
+    buckets['sum_x_profit'] = start * buckets['sum_profit'] + buckets['sum_i_profit']
+    buckets['sum_x_revenue'] = start * buckets['sum_revenue'] + buckets['sum_i_revenue']
+
+    grouped = buckets.groupby('shopkeeper_id', sort=True)
+    shop_sums = grouped[BUCKET_SUMS[:-2] + ['sum_x_profit', 'sum_x_revenue']].sum()
+    shop_sums = shop_sums.rename(columns={'rows': 'months'})
+    first = buckets.loc[start == 0].set_index('shopkeeper_id')
+    shop_sums['first_profit'] = first['first_profit']
+    shop_sums['first_revenue'] = first['first_revenue']
+
+    metrics = derive_metrics(shop_sums)
+    aggregated = pd.DataFrame({
+        'shopkeeper_id': shop_sums.index.to_numpy(),
+        'name': first['name'].to_numpy(),
+        'business_type': first['business_type'].to_numpy(),
+        **{column: np.asarray(metrics[column]) for column in AGGREGATED_COLUMNS[3:]}
+    })
+    for column in INTEGER_COLUMNS:
+        aggregated[column] = aggregated[column].astype('int64')
+    return aggregated[AGGREGATED_COLUMNS]
+
+def aggregate_csv_chunked(path, chunksize=DEFAULT_CHUNKSIZE):
+    """aggregate_shopkeeper_data over a CSV too large to load at once
+
+    Streams the file in chunks with the explicit dtype schema (months in
+    calendar order) and folds each
+    chunk into per-(shopkeeper, month) partial aggregates. Memory grows with
+    the number of shopkeepers times distinct months, not with the number of
+    rows. The result matches aggregate_shopkeeper_data on load_ledger(path).
+    """
+    sums = None
+    firsts = None
+    for chunk in read_ledger(path, chunksize=chunksize):
+        chunk['month'] = to_month_categorical(chunk['month'])
+        seen_rows = sums['rows'] if sums is not None else None
+        chunk_sums, chunk_firsts = _bucket_partials(chunk, seen_rows)
+        if sums is None:
+            sums, firsts = chunk_sums, chunk_firsts
+        else:
+            sums = sums.add(chunk_sums, fill_value=0)
+            firsts = pd.concat([firsts, chunk_firsts])
+
+    if sums is None:
+        return pd.DataFrame(columns=AGGREGATED_COLUMNS)
+    return _finalize(sums, firsts)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Load and aggregate shopkeeper ledger CSVs')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    aggregate_parser = commands.add_parser('aggregate', help='Aggregate a large ledger CSV in chunks')
+    aggregate_parser.add_argument('csv_path')
+    aggregate_parser.add_argument('output_path')
+    aggregate_parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE)
+
+    report_parser = commands.add_parser('memory-report', help='Compare ledger memory before and after compaction')
+    report_parser.add_argument('csv_path')
+    args = parser.parse_args()
+
+    if args.command == 'aggregate':
+        aggregated = aggregate_csv_chunked(args.csv_path, args.chunksize)
+        aggregated.to_csv(args.output_path, index=False)
+        print(f"Aggregated {len(aggregated)} shopkeepers into {args.output_path}")
+    else:
+        report = memory_report(args.csv_path)
+        print(report.to_string(formatters={'reduction': '{:.1%}'.format}))
@@ -0,0 +1,152 @@
+import os
+import json
+import uuid
+import tempfile
+from datetime import datetime
+from model_store import MODEL_DIR, _write_atomic
+
+# Training job records live next to the model versions they produce
+JOBS_DIR = os.path.join(MODEL_DIR, 'jobs')
+
+# Holds the id of the queued or running job
+ACTIVE_FILE = 'ACTIVE'
+
+def _process_alive(pid):
+    if pid == os.getpid():
+        return True
+    if os.name != 'posix':
+        # os.kill would terminate the process on Windows
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+class TrainingJobStore:
+    """Background training job records shared by every server process
+
+    Each job is a JSON file named after its id, so any worker can answer a
+    status request for a job another worker started, and job history
+    survives worker restarts. At most one job is queued or running at a
+    time: starting one claims the ACTIVE file with a hard link, which fails
+    if the file exists, so it works across processes without OS-specific
+    locking. A job whose process exited before finishing it is reported as
+    failed.
+    """
+
+    def __init__(self, directory=JOBS_DIR, max_jobs=20):
+        self.directory = directory
+        self.max_jobs = max_jobs
+
+    def _path(self, job_id):
+        return os.path.join(self.directory, f'{job_id}.json')
+
+    def save(self, job):
+        os.makedirs(self.directory, exist_ok=True)
+        _write_atomic(self._path(job['job_id']), json.dumps(job))
+
+    def get(self, job_id):
+        """Job record as a dict, or None if unknown"""
+        # Ids are uuid hex strings; anything else cannot name a job file
+        if not (isinstance(job_id, str) and len(job_id) == 32 and job_id.isalnum()):
+            return None
+        try:
+            with open(self._path(job_id)) as f:
+                job = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if job['status'] in ('queued', 'running') and not _process_alive(job['pid']):
+            job = self.finish(job, 'failed', error='Server process exited before the job finished')
+        return job
+
+    def active(self):
+        """The queued or running job, or None"""
+        try:
+            with open(os.path.join(self.directory, ACTIVE_FILE)) as f:
+                job_id = f.read().strip()
+        except OSError:
+            return None
+        job = self.get(job_id)
+        if job is None or job['status'] not in ('queued', 'running'):
+            self._release(job_id)
+            return None
+        return job
+
+    def create(self):
+        """Record a new queued job for this process
+
+        Returns ``(job, created)``. While another job is queued or running,
+        that job is returned with ``created`` False instead.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        job = {
+            'job_id': uuid.uuid4().hex,
+            'status': 'queued',
+            'created_at': datetime.now().isoformat(),
+            'started_at': None,
+            'finished_at': None,
+            'model_version': None,
+            'error': None,
+            'pid': os.getpid()
+        }
+        # Written first so readers always find the job its id points at
+        self.save(job)
+        while True:
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix='.tmp-')
+            with os.fdopen(fd, 'w') as f:
+                f.write(job['job_id'])
+            try:
+                # Linking never replaces an existing file, so only one process can claim
+                os.link(tmp_path, os.path.join(self.directory, ACTIVE_FILE))
+            except FileExistsError:
+                active = self.active()
+                if active is not None:
+                    self._discard(job)
+                    return active, False
+                # active() released the claim of a finished or dead job; try again
+                continue
+            finally:
+                os.remove(tmp_path)
+            self._prune()
+            return job, True
+
+    def _discard(self, job):
+        try:
+            os.remove(self._path(job['job_id']))
+        except OSError:
+            pass
+
+    def update(self, job, **fields):
+        job.update(fields)
+        self.save(job)
+        return job
+
+    def finish(self, job, status, **fields):
+        """Record a job's final status and let the next job start"""
+        job = self.update(job, status=status, finished_at=datetime.now().isoformat(), **fields)
+        self._release(job['job_id'])
+        return job
+
+    def _release(self, job_id):
+        path = os.path.join(self.directory, ACTIVE_FILE)
+        try:
+            with open(path) as f:
+                if f.read().strip() != job_id:
+                    return
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _prune(self):
+        jobs = [entry for entry in os.listdir(self.directory) if entry.endswith('.json')]
+        if len(jobs) <= self.max_jobs:
+            return
+        jobs.sort(key=lambda entry: os.path.getmtime(os.path.join(self.directory, entry)))
+        for entry in jobs[:len(jobs) - self.max_jobs]:
+            try:
+                os.remove(os.path.join(self.directory, entry))
+            except OSError:
+                pass
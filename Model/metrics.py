@@ -0,0 +1,260 @@
+import os
+import json
+import time
+import bisect
+import tempfile
+import threading
+
+# Latency buckets in seconds, from sub-millisecond model calls to slow batches
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value)) if abs(value) < 1e15 else repr(value)
+    return repr(value) if isinstance(value, float) else str(value)
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs.extend(f'{name}="{_escape(value)}"' for name, value in extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def header(self):
+        return [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+
+class Counter(_Metric):
+    """Monotonic count per label combination"""
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values = {}
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def snapshot(self):
+        with self._lock:
+            return [[list(labels), value] for labels, value in self._values.items()]
+
+    def render(self, others=()):
+        """Exposition lines, adding in snapshots from other processes"""
+        with self._lock:
+            totals = dict(self._values)
+        for snapshot in others:
+            for labels, value in snapshot:
+                labels = tuple(labels)
+                totals[labels] = totals.get(labels, 0) + value
+        values = sorted(totals.items())
+        return self.header() + [
+            f'{self.name}{_labels(self.labelnames, labels)} {_format_value(value)}' for labels, value in values
+        ]
+
+class Gauge(_Metric):
+    """Current value per label combination, set directly or read from a callback"""
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=(), callback=None):
+        super().__init__(name, documentation, labelnames)
+        self._values = {}
+        self._callback = callback
+
+    def set(self, value, *labels):
+        with self._lock:
+            self._values[labels] = value
+
+    def render(self, others=()):
+        """Exposition lines; gauges describe the process that renders them"""
+        if self._callback is not None:
+            values = sorted(self._callback().items())
+        else:
+            with self._lock:
+                values = sorted(self._values.items())
+        return self.header() + [
+            f'{self.name}{_labels(self.labelnames, labels)} {_format_value(value)}' for labels, value in values
+        ]
+
+class _Timer:
+    __slots__ = ('histogram', 'labels', 'started')
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.started, *self.labels)
+        return False
+
+class Histogram(_Metric):
+    """Bucketed distribution per label combination
+
+    An observation is one bisect and three additions under a lock, so it
+    costs about a microsecond and can stay on in production.
+    """
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def time(self, *labels):
+        """Context manager observing the wall time of its block"""
+        return _Timer(self, labels)
+
+    def snapshot(self):
+        with self._lock:
+            return [[list(labels), list(counts), total, count] for labels, (counts, total, count) in self._series.items()]
+
+    def render(self, others=()):
+        """Exposition lines, adding in snapshots from other processes"""
+        with self._lock:
+            merged = {labels: [list(counts), total, count] for labels, (counts, total, count) in self._series.items()}
+        for snapshot in others:
+            for labels, counts, total, count in snapshot:
+                labels = tuple(labels)
+                if len(counts) != len(self.buckets) + 1:
+                    continue
+                series = merged.setdefault(labels, [[0] * len(counts), 0.0, 0])
+                series[0] = [mine + theirs for mine, theirs in zip(series[0], counts)]
+                series[1] += total
+                series[2] += count
+        series = sorted(merged.items())
+        lines = self.header()
+        for labels, (counts, total, count) in series:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = (('le', _format_value(float(bound))),)
+                lines.append(f'{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}')
+            lines.append(f'{self.name}_sum{_labels(self.labelnames, labels)} {_format_value(total)}')
+            lines.append(f'{self.name}_count{_labels(self.labelnames, labels)} {count}')
+        return lines
+
+class MetricsRegistry:
+    """Set of metrics rendered together in the Prometheus text format
+
+    With ``multiprocess_dir``, every process serving the app writes its
+    counters and histograms to ``<pid>.json`` in that directory, within
+    ``flush_interval`` seconds of schedule_flush() and on flush(), and
+    render() adds in the files of all other processes, so any worker of a
+    pre-fork server reports totals for the whole server. Files of exited
+    workers are kept so counters never go backwards. Gauges are not merged:
+    they describe the process that renders them.
+    """
+
+    def __init__(self, multiprocess_dir=None, flush_interval=1.0):
+        self._metrics = []
+        self.multiprocess_dir = multiprocess_dir
+        self.flush_interval = flush_interval
+        self._pending = False
+        self._flusher_pid = None
+        self._flush_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=(), callback=None):
+        return self.register(Gauge(name, documentation, labelnames, callback))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def flush(self):
+        """Write this process's counters and histograms to the shared directory"""
+        if self.multiprocess_dir is None:
+            return
+        with self._write_lock:
+            snapshot = {metric.name: metric.snapshot() for metric in self._metrics if hasattr(metric, 'snapshot')}
+            os.makedirs(self.multiprocess_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.multiprocess_dir, prefix='.tmp-')
+            with os.fdopen(fd, 'w') as f:
+                json.dump(snapshot, f)
+            os.replace(tmp_path, os.path.join(self.multiprocess_dir, f'{os.getpid()}.json'))
+
+    def schedule_flush(self):
+        """Have this process's counts written within flush_interval seconds
+
+        Cheap enough to call on every request: the write happens on a
+        background thread, started on first use in each process so it also
+        runs in workers forked after the registry was created.
+        """
+        if self.multiprocess_dir is None:
+            return
+        self._pending = True
+        if self._flusher_pid != os.getpid():
+            with self._flush_lock:
+                if self._flusher_pid != os.getpid():
+                    self._flusher_pid = os.getpid()
+                    threading.Thread(target=self._flush_loop, daemon=True).start()
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.flush_interval)
+            if self._pending:
+                self._pending = False
+                try:
+                    self.flush()
+                except OSError:
+                    # Try again with the next batch of updates
+                    self._pending = True
+
+    def _other_processes(self):
+        """Snapshots written by every other process, keyed by metric name"""
+        snapshots = {}
+        if self.multiprocess_dir is None or not os.path.isdir(self.multiprocess_dir):
+            return snapshots
+        own = f'{os.getpid()}.json'
+        for entry in os.listdir(self.multiprocess_dir):
+            if not entry.endswith('.json') or entry == own:
+                continue
+            try:
+                with open(os.path.join(self.multiprocess_dir, entry)) as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                continue
+            for name, series in snapshot.items():
+                snapshots.setdefault(name, []).append(series)
+        return snapshots
+
+    def render(self):
+        others = self._other_processes()
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render(others.get(metric.name, ())))
+        return '\n'.join(lines) + '\n'
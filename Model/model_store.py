@@ -0,0 +1,136 @@
+import os
+import json
+import shutil
+import tempfile
+from datetime import datetime
+import joblib
+from forest_eval import FlatForest, compile_model
+
+# Default location of versioned model artifacts, relative to Model/
+MODEL_DIR = 'models'
+
+# Name of the file pointing at the version currently in service
+CURRENT_FILE = 'CURRENT'
+
+MODEL_FILE = 'model.joblib'
+METADATA_FILE = 'metadata.json'
+FOREST_DIR = 'forest'
+
+class ModelNotFoundError(FileNotFoundError):
+    """Raised when the store has no usable model artifact"""
+
+def _version_name(version):
+    return f'v{version:04d}'
+
+def list_versions(root=MODEL_DIR):
+    """Saved artifact versions, oldest first"""
+    if not os.path.isdir(root):
+        return []
+    versions = []
+    for entry in os.listdir(root):
+        if entry.startswith('v') and entry[1:].isdigit():
+            if os.path.exists(os.path.join(root, entry, MODEL_FILE)):
+                versions.append(int(entry[1:]))
+    return sorted(versions)
+
+def current_version(root=MODEL_DIR):
+    """Version marked as current, falling back to the newest saved version"""
+    try:
+        with open(os.path.join(root, CURRENT_FILE)) as f:
+            version = int(f.read().strip())
+        if os.path.exists(os.path.join(root, _version_name(version), MODEL_FILE)):
+            return version
+    except (OSError, ValueError):
+        pass
+    versions = list_versions(root)
+    return versions[-1] if versions else None
+
+def _write_atomic(path, text):
+    directory = os.path.dirname(path) or '.'
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+    os.chmod(tmp_path, 0o644)
+    with os.fdopen(fd, 'w') as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def save_model(model, metadata=None, root=MODEL_DIR, make_current=True):
+    """Save a model as a new immutable version and return its version number
+
+    The artifact is written uncompressed so its NumPy arrays can be
+    memory-mapped on load. Forests are also exported as flat node arrays
+    for the compiled evaluator. The version is assembled in a temporary
+    directory and renamed into place, so readers never see a half-written
+    version.
+    """
+    os.makedirs(root, exist_ok=True)
+    staging = tempfile.mkdtemp(dir=root, prefix='.staging-')
+    os.chmod(staging, 0o755)
+    try:
+        joblib.dump(model, os.path.join(staging, MODEL_FILE))
+        compiled = compile_model(model)
+        if compiled is not None:
+            compiled.save(os.path.join(staging, FOREST_DIR))
+
+        versions = list_versions(root)
+        version = versions[-1] + 1 if versions else 1
+        info = dict(metadata or {})
+        info.update({
+            'version': version,
+            'model_type': type(model).__name__,
+            'compiled': compiled is not None,
+            'created_at': datetime.now().isoformat()
+        })
+        with open(os.path.join(staging, METADATA_FILE), 'w') as f:
+            json.dump(info, f, indent=2)
+
+        os.rename(staging, os.path.join(root, _version_name(version)))
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    if make_current:
+        set_current_version(version, root)
+    return version
+
+def set_current_version(version, root=MODEL_DIR):
+    """Point CURRENT at an existing version (used for promotion and rollback)"""
+    if not os.path.exists(os.path.join(root, _version_name(version), MODEL_FILE)):
+        raise ModelNotFoundError(f'Model version {version} not found in {root}')
+    _write_atomic(os.path.join(root, CURRENT_FILE), f'{version}\n')
+
+def load_model(version=None, root=MODEL_DIR, mmap=True):
+    """Load a model artifact, memory-mapping its arrays by default
+
+    Returns ``(model, metadata)``. With ``mmap=True`` large arrays are mapped
+    read-only from the artifact file, so worker processes loading the same
+    version share those pages through the OS page cache.
+    """
+    if version is None:
+        version = current_version(root)
+    if version is None:
+        raise ModelNotFoundError(f'No model artifacts found in {root}')
+
+    path = os.path.join(root, _version_name(version))
+    if not os.path.exists(os.path.join(path, MODEL_FILE)):
+        raise ModelNotFoundError(f'Model version {version} not found in {root}')
+
+    model = joblib.load(os.path.join(path, MODEL_FILE), mmap_mode='r' if mmap else None)
+    try:
+        with open(os.path.join(path, METADATA_FILE)) as f:
+            metadata = json.load(f)
+    except (OSError, ValueError):
+        metadata = {'version': version}
+    return model, metadata
+
+def load_flat_forest(version=None, root=MODEL_DIR, mmap=True):
+    """Load the flat-array export of a version, or None if it has none"""
+    if version is None:
+        version = current_version(root)
+    if version is None:
+        return None
+    path = os.path.join(root, _version_name(version), FOREST_DIR)
+    if not os.path.isdir(path):
+        return None
+    return FlatForest.load(path, mmap=mmap)
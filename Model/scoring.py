@@ -0,0 +1,135 @@
+import numpy as np
+
+# Risk bands as (lower bound, category), checked from the top down
+PIPELINE_RISK_BANDS = [
+    (80, 'Excellent'),
+    (70, 'Good'),
+    (60, 'Fair'),
+    (50, 'Moderate Risk')
+]
+API_RISK_BANDS = [
+    (80, 'Excellent'),
+    (60, 'Good'),
+    (40, 'Fair'),
+    (20, 'Moderate Risk')
+]
+LOWEST_RISK_CATEGORY = 'High Risk'
+
+# Rule-based score weights used by the offline pipeline (total 100)
+PIPELINE_WEIGHTS = {
+    'payment': 0.40,
+    'profit_margin': 0.15,
+    'profit_trend': 0.15,
+    'loss_months': 0.10,
+    'expense_ratio': 0.10,
+    'transaction_volume': 0.05,
+    'days_active': 0.05
+}
+
+# Points available per component in the simple API formula (total 100)
+SIMPLE_POINTS = {
+    'payment_reliability': 30,
+    'profit_margin': 25,
+    'transaction_volume': 20,
+    'daily_transactions': 15,
+    'profitable': 10
+}
+
+def _column(columns, name):
+    return np.asarray(columns[name], dtype=float)
+
+def _clip(values, lower, upper):
+    """Clip to [lower, upper] with the same NaN handling as max(lower, min(upper, x))"""
+    return np.fmin(np.fmax(values, lower), upper)
+
+def _safe_divide(numerator, denominator):
+    """numerator / denominator, or 0 where the denominator is not positive"""
+    positive = denominator > 0
+    return np.divide(numerator, denominator, out=np.zeros_like(numerator), where=positive)
+
+def risk_categories(scores, bands=PIPELINE_RISK_BANDS):
+    """Map an array of scores to risk category labels"""
+    scores = np.asarray(scores, dtype=float)
+    conditions = [scores >= lower for lower, _ in bands]
+    labels = [label for _, label in bands]
+    return np.select(conditions, labels, default=LOWEST_RISK_CATEGORY)
+
+def pipeline_credit_scores(columns, weights=PIPELINE_WEIGHTS):
+    """Score aggregated shopkeepers in one vectorized pass
+
+    ``columns`` is anything indexable by column name (a DataFrame or a dict
+    of arrays) holding the aggregate_shopkeeper_data outputs. Returns
+    ``(scores, risk_categories)`` as NumPy arrays.
+    """
+    on_time = _column(columns, 'on_time_payments')
+    missed = _column(columns, 'missed_payments')
+
+    # Payment behavior (40% weight)
+    payment_score = _clip(on_time / (on_time + missed + 1e-6) * 100 * weights['payment'], 0, 100)
+
+    # Profitability (30% weight)
+    margin = np.fmin(_column(columns, 'avg_profit_margin'), 30)
+    trend = _clip(_column(columns, 'profit_trend'), 0, 15)
+    profit_score = _clip(
+        margin / 30 * 100 * weights['profit_margin'] +
+        trend / 15 * 100 * weights['profit_trend'],
+        0, 100
+    )
+
+    # Business health (20% weight)
+    loss_share = _column(columns, 'monthly_loss_count') / 6
+    expense_share = np.fmin(1, _column(columns, 'avg_expense_ratio') / 100)
+    health_score = _clip(
+        (1 - loss_share) * 100 * weights['loss_months'] +
+        (1 - expense_share) * 100 * weights['expense_ratio'],
+        0, 100
+    )
+
+    # Activity level (10% weight)
+    volume = np.fmin(1, _column(columns, 'transactions_per_month') / 100)
+    activity = np.fmin(1, _column(columns, 'days_active') / 180)
+    activity_score = _clip(
+        volume * 100 * weights['transaction_volume'] +
+        activity * 100 * weights['days_active'],
+        0, 100
+    )
+
+    scores = payment_score + profit_score + health_score + activity_score
+    return scores, risk_categories(scores, PIPELINE_RISK_BANDS)
+
+def derived_metrics(columns):
+    """Ratios derived from raw monthly figures, guarded against zero denominators"""
+    transactions = _column(columns, 'transactions')
+    on_time = _column(columns, 'on_time_payments')
+    missed = _column(columns, 'missed_payments')
+    return {
+        'payment_reliability': _safe_divide(on_time, on_time + missed),
+        'profit_margin': _safe_divide(_column(columns, 'profit'), _column(columns, 'revenue')),
+        'avg_daily_transactions': _safe_divide(transactions, _column(columns, 'days_active'))
+    }
+
+def clamp_scores(raw_scores):
+    """Truncate raw scores to whole numbers and clamp them to 0-100"""
+    return np.clip(np.trunc(np.asarray(raw_scores, dtype=float)), 0, 100).astype(int)
+
+def simple_credit_scores(columns, points=SIMPLE_POINTS):
+    """Formula-only credit scores for raw monthly figures
+
+    Vectorized form of the simple API formula. Returns
+    ``(scores, risk_categories, metrics)`` where scores are whole numbers in
+    0-100 and metrics holds the derived ratios used.
+    """
+    metrics = derived_metrics(columns)
+    transactions = _column(columns, 'transactions')
+    profit = _column(columns, 'profit')
+
+    raw_scores = (
+        metrics['payment_reliability'] * points['payment_reliability'] +
+        np.fmin(metrics['profit_margin'] * 100, points['profit_margin']) +
+        np.fmin(transactions / 10, points['transaction_volume']) +
+        np.fmin(metrics['avg_daily_transactions'] / 5, points['daily_transactions']) +
+        np.where(profit > 0, points['profitable'], 0)
+    )
+
+    scores = clamp_scores(raw_scores)
+    return scores, risk_categories(scores, API_RISK_BANDS), metrics
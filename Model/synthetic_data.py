@@ -0,0 +1,77 @@
+import argparse
+import numpy as np
+import pandas as pd
+from ingest import MONTHS, MONTH_DTYPE
+
+BUSINESS_TYPES = [
+    'Agriculture', 'Construction', 'Electronics', 'Food & Beverage', 'Healthcare',
+    'Manufacturing', 'Retail', 'Service', 'Textiles', 'Wholesale'
+]
+
+# Shop names are drawn as prefix + goods + suffix
+NAME_PREFIXES = ['Premium', 'Global', 'Sunrise', 'Himalayan', 'City', 'Everest', 'Modern', 'Royal', 'Green', 'Golden']
+NAME_GOODS = ['Groceries', 'Hardware', 'Textiles', 'Pharmacy', 'Electronics', 'Foods', 'Dairy', 'Builders', 'Crafts', 'Agro']
+NAME_SUFFIXES = ['Trade Co', 'Wholesale Co', 'Store', 'Mart', 'Enterprises', 'Suppliers', 'Pvt Ltd', 'Center']
+
+SHOP_NAMES = [f'{prefix} {goods} {suffix}' for prefix in NAME_PREFIXES for goods in NAME_GOODS for suffix in NAME_SUFFIXES]
+
+def generate_ledger(n_shops, months=6, seed=42):
+    """Synthetic monthly ledger in the bizsathi schema
+
+    Every column is drawn for all shops at once as an (n_shops, months)
+    array, so a million shops take seconds. The same arguments always give
+    the same frame. Rows come shop by shop in calendar order, like the
+    shipped CSV; name, business_type and month are categoricals as in
+    ingest.load_ledger.
+    """
+    if not 1 <= months <= len(MONTHS):
+        raise ValueError(f'months must be between 1 and {len(MONTHS)}')
+    rng = np.random.default_rng(seed)
+    shape = (n_shops, months)
+
+    # Per-shop characteristics
+    business_type = rng.integers(0, len(BUSINESS_TYPES), n_shops)
+    name = rng.integers(0, len(SHOP_NAMES), n_shops)
+    base_transactions = rng.lognormal(np.log(28), 0.5, n_shops)
+    reliability = rng.beta(8, 2, n_shops)
+    ticket_size = rng.lognormal(np.log(6000), 0.5, n_shops)
+    expense_ratio = np.clip(rng.normal(0.78, 0.08, n_shops), 0.4, 1.2)
+    growth = rng.normal(0.0, 0.05, n_shops)
+
+    # Monthly figures
+    trend = (1 + growth[:, None]) ** np.arange(months)
+    transactions = np.maximum(1, rng.poisson(base_transactions[:, None] * trend))
+    on_time_payments = rng.binomial(transactions, reliability[:, None])
+    missed_payments = transactions - on_time_payments
+    avg_transaction_amount = np.rint(ticket_size[:, None] * rng.lognormal(0, 0.15, shape))
+    revenue = np.round(transactions * avg_transaction_amount * rng.uniform(0.45, 0.6, shape), 2)
+    expenses = np.round(revenue * np.clip(expense_ratio[:, None] + rng.normal(0, 0.06, shape), 0.3, 1.5), 2)
+    profit = np.round(revenue - expenses, 2)
+    days_active = rng.integers(20, 31, shape)
+
+    return pd.DataFrame({
+        'shopkeeper_id': np.repeat(np.arange(1, n_shops + 1, dtype=np.int64), months),
+        'name': pd.Categorical.from_codes(np.repeat(name, months), categories=SHOP_NAMES),
+        'business_type': pd.Categorical.from_codes(np.repeat(business_type, months), categories=BUSINESS_TYPES),
+        'month': pd.Categorical.from_codes(np.tile(np.arange(months), n_shops), dtype=MONTH_DTYPE),
+        'transactions': transactions.ravel().astype(np.int64),
+        'on_time_payments': on_time_payments.ravel().astype(np.int64),
+        'missed_payments': missed_payments.ravel().astype(np.int64),
+        'avg_transaction_amount': avg_transaction_amount.ravel(),
+        'revenue': revenue.ravel(),
+        'expenses': expenses.ravel(),
+        'profit': profit.ravel(),
+        'days_active': days_active.ravel().astype(np.int64)
+    })
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Write a synthetic shopkeeper ledger CSV')
+    parser.add_argument('shops', type=int)
+    parser.add_argument('output_path')
+    parser.add_argument('--months', type=int, default=6)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    ledger = generate_ledger(args.shops, args.months, args.seed)
+    ledger.to_csv(args.output_path, index=False)
+    print(f"Wrote {len(ledger)} rows for {args.shops} shopkeepers to {args.output_path}")
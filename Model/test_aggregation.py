@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+import pytest
+from aggregation import AGGREGATED_COLUMNS, aggregate_shopkeeper_data, grouped_slope, relative_trend
+from ingest import load_ledger, to_month_categorical
+
+def reference_aggregate(df):
+    """The original per-shop loop, with np.polyfit in place of linregress"""
+    aggregated = []
+    for shop_id, group in df.groupby('shopkeeper_id', observed=True):
+        group = group.sort_values('month')
+        months = len(group)
+        profit_trend = revenue_trend = 0
+        if months > 1:
+            profit_slope = np.polyfit(range(months), group['profit'].astype(float), 1)[0]
+            revenue_slope = np.polyfit(range(months), group['revenue'].astype(float), 1)[0]
+            first_profit = group['profit'].iloc[0]
+            first_revenue = group['revenue'].iloc[0]
+            profit_trend = profit_slope * months / abs(first_profit) * 100 if first_profit != 0 else 0
+            revenue_trend = revenue_slope * months / abs(first_revenue) * 100 if first_revenue != 0 else 0
+        aggregated.append({
+            'shopkeeper_id': shop_id,
+            'name': group['name'].iloc[0],
+            'business_type': group['business_type'].iloc[0],
+            'transactions_per_month': group['transactions'].mean(),
+            'on_time_payments': group['on_time_payments'].sum(),
+            'missed_payments': group['missed_payments'].sum(),
+            'avg_transaction_amount': group['avg_transaction_amount'].mean(),
+            'days_active': group['days_active'].sum(),
+            'monthly_profit_avg': group['profit'].mean(),
+            'monthly_revenue_avg': group['revenue'].mean(),
+            'monthly_loss_count': (group['profit'] < 0).sum(),
+            'avg_profit_margin': (group['profit'] / group['revenue']).mean() * 100,
+            'avg_expense_ratio': (group['expenses'] / group['revenue']).mean() * 100,
+            'payment_reliability': group['on_time_payments'].sum() / group['transactions'].sum() * 100,
+            'profit_trend': profit_trend,
+            'revenue_trend': revenue_trend
+        })
+    return pd.DataFrame(aggregated)[AGGREGATED_COLUMNS]
+
+def assert_same_aggregates(df):
+    expected = reference_aggregate(df)
+    actual = aggregate_shopkeeper_data(df)
+    for frame in (expected, actual):
+        for column in ('name', 'business_type'):
+            frame[column] = frame[column].astype(str)
+    pd.testing.assert_frame_equal(actual.reset_index(drop=True), expected.reset_index(drop=True),
+                                  check_dtype=False, rtol=1e-9, atol=1e-6)
+
+def ledger(rows):
+    columns = ['shopkeeper_id', 'name', 'business_type', 'month', 'transactions', 'on_time_payments',
+               'missed_payments', 'avg_transaction_amount', 'revenue', 'expenses', 'profit', 'days_active']
+    df = pd.DataFrame(rows, columns=columns)
+    df['month'] = to_month_categorical(df['month'])
+    return df
+
+def shop(shop_id, months, revenue, profit):
+    return [
+        (shop_id, f'Shop {shop_id}', 'Retail', month, 20, 18, 2, 500.0, rev, rev - prof, prof, 26)
+        for month, rev, prof in zip(months, revenue, profit)
+    ]
+
+def test_shipped_ledger_matches_reference_loop():
+    assert_same_aggregates(load_ledger('bizsathi_1000_shopkeepers.csv'))
+
+def test_single_month_shop_has_no_trend():
+    df = ledger(shop(1, ['March'], [1000.0], [150.0]))
+    assert_same_aggregates(df)
+    result = aggregate_shopkeeper_data(df)
+    assert result.loc[0, 'profit_trend'] == 0
+    assert result.loc[0, 'revenue_trend'] == 0
+
+def test_constant_sales_have_zero_trend():
+    df = ledger(shop(2, ['January', 'February', 'March', 'April'], [800.0] * 4, [100.0] * 4))
+    assert_same_aggregates(df)
+    assert aggregate_shopkeeper_data(df).loc[0, 'revenue_trend'] == pytest.approx(0)
+
+def test_zero_sales_shop():
+    df = ledger(shop(3, ['January', 'February', 'March'], [0.0] * 3, [0.0] * 3))
+    assert_same_aggregates(df)
+    result = aggregate_shopkeeper_data(df)
+    assert result.loc[0, 'profit_trend'] == 0
+    assert result.loc[0, 'revenue_trend'] == 0
+
+def test_zero_mean_profit_and_zero_first_month():
+    rows = shop(4, ['January', 'February', 'March', 'April'], [500.0, 700.0, 900.0, 650.0],
+                [-100.0, 100.0, -50.0, 50.0])
+    rows += shop(5, ['January', 'February', 'March'], [0.0, 400.0, 800.0], [0.0, 40.0, 90.0])
+    assert_same_aggregates(ledger(rows))
+
+def test_months_are_ordered_by_calendar_not_row_order():
+    rows = shop(6, ['March', 'January', 'February'], [300.0, 100.0, 200.0], [30.0, 10.0, 20.0])
+    df = ledger(rows)
+    assert_same_aggregates(df)
+    assert aggregate_shopkeeper_data(df).loc[0, 'revenue_trend'] == pytest.approx(100 * 3)
+
+def test_grouped_slope_matches_polyfit_per_group():
+    rng = np.random.default_rng(0)
+    keys = np.repeat(np.arange(50), 7)
+    x = np.tile(np.arange(7), 50)
+    y = rng.normal(size=len(keys))
+    slopes = grouped_slope(keys, x, y)
+    for key in range(50):
+        mask = keys == key
+        assert slopes[key] == pytest.approx(np.polyfit(x[mask], y[mask], 1)[0])
+
+def test_relative_trend_guards_zero_base_and_single_month():
+    trend = relative_trend([2.0, 2.0, 2.0], [4, 4, 1], [10.0, 0.0, 10.0])
+    assert trend.tolist() == pytest.approx([80.0, 0.0, 0.0])
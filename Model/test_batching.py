@@ -0,0 +1,56 @@
+import time
+import threading
+import pytest
+from batching import PredictionBatcher
+
+def first_column(X):
+    return X[:, 0]
+
+def test_uncontended_calls_do_not_wait():
+    waits = []
+    batcher = PredictionBatcher(first_column, max_wait=5.0, on_batch=lambda size, waited: waits.append(waited))
+    started = time.perf_counter()
+    assert [batcher.predict([[i, 0]]).tolist() for i in range(3)] == [[0], [1], [2]]
+    assert time.perf_counter() - started < 1.0
+    assert len(waits) == 3 and max(waits) < 1.0
+
+def test_calls_arriving_during_a_prediction_are_coalesced():
+    entered, release = threading.Event(), threading.Event()
+
+    def predict_fn(X):
+        if not entered.is_set():
+            entered.set()
+            release.wait()
+        return first_column(X)
+
+    sizes = []
+    batcher = PredictionBatcher(predict_fn, max_batch=4, max_wait=5.0, on_batch=lambda size, waited: sizes.append(size))
+    results = {}
+
+    def call(i):
+        results[i] = batcher.predict([[i]]).tolist()
+
+    first = threading.Thread(target=call, args=(0,))
+    first.start()
+    entered.wait()
+    # These queue behind the running prediction; the fourth fills their batch
+    others = [threading.Thread(target=call, args=(i,)) for i in range(1, 5)]
+    for thread in others:
+        thread.start()
+    for thread in others:
+        thread.join()
+    release.set()
+    first.join()
+
+    assert sorted(sizes) == [1, 4]
+    assert results == {i: [i] for i in range(5)}
+    assert batcher.stats()['batches'] == 2
+
+def test_errors_reach_every_caller_and_do_not_stall_the_batcher():
+    def fail(X):
+        raise ValueError('bad rows')
+
+    batcher = PredictionBatcher(fail, max_wait=5.0)
+    for _ in range(2):
+        with pytest.raises(ValueError, match='bad rows'):
+            batcher.predict([[1]])
@@ -0,0 +1,17 @@
+import pytest
+import credit_api
+
+@pytest.fixture
+def client():
+    return credit_api.app.test_client()
+
+@pytest.mark.parametrize('body, content_type', [
+    ('{"shopkeepers": [', 'application/json'),
+    ('[]', 'text/plain'),
+    ('{"shopkeepers": 3}', 'application/json'),
+    ('"records"', 'application/json'),
+])
+def test_batch_endpoint_rejects_bodies_that_are_not_records(client, body, content_type):
+    response = client.post('/calculate_credit_scores', data=body, content_type=content_type)
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'Expected an array of shopkeeper records'}
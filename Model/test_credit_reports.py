@@ -0,0 +1,20 @@
+import os
+import pytest
+from aggregation import aggregate_shopkeeper_data
+from credit_reports import CreditReportService
+from ingest import load_ledger
+from scoring import pipeline_credit_scores
+
+@pytest.fixture(scope='module')
+def frames():
+    ledger = load_ledger('bizsathi_1000_shopkeepers.csv')
+    aggregated = aggregate_shopkeeper_data(ledger)
+    aggregated['credit_score'], aggregated['risk_category'] = pipeline_credit_scores(aggregated)
+    return aggregated, ledger
+
+def test_charts_are_written_to_a_new_plot_dir(frames, tmp_path):
+    plot_dir = str(tmp_path / 'plots' / 'trends')
+    service = CreditReportService(*frames, plot_dir=plot_dir)
+    reports = service.reports([1, 2], plot=True)
+    assert [report['shopkeeper_id'] for report in reports] == [1, 2]
+    assert sorted(os.listdir(plot_dir)) == ['shopkeeper_1_trends.png', 'shopkeeper_2_trends.png']
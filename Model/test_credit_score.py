@@ -0,0 +1,48 @@
+import os
+import shutil
+import pytest
+import credit_score
+from credit_score import STAGES, CreditScorePipeline
+from feature_store import FeatureStore
+from ingest import load_ledger
+
+DATA = os.path.abspath('bizsathi_1000_shopkeepers.csv')
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    shutil.copy(DATA, tmp_path)
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+@pytest.fixture
+def store_path(workdir):
+    path = str(workdir / 'features.sqlite')
+    store = FeatureStore(path)
+    store.rebuild(load_ledger(credit_score.DATA_PATH))
+    store.close()
+    return path
+
+def pipeline(**kwargs):
+    return CreditScorePipeline(checkpoint_dir='checkpoints', booster='hist', n_jobs=1, **kwargs)
+
+def test_every_stage_runs_from_the_feature_store(store_path, capsys):
+    run = pipeline(feature_store_path=store_path).run(STAGES, plots=False, shopkeeper_id=1)
+    assert 'Reading shopkeeper features from the feature store' in capsys.readouterr().out
+    assert os.path.exists(credit_score.SCORES_PATH)
+    assert os.path.exists(credit_score.MODEL_PATH)
+    assert len(run.report()) == 1000
+
+def test_report_stage_alone_from_the_feature_store(store_path):
+    report = pipeline(feature_store_path=store_path).run(['report'], plots=False, shopkeeper_id=1).report()
+    assert report[1]['shopkeeper_id'] == 1
+
+def test_feature_store_scores_match_the_ledger(store_path):
+    from_store = pipeline(feature_store_path=store_path).score()
+    from_ledger = pipeline().score()
+    assert (from_store['risk_category'].tolist() == from_ledger['risk_category'].tolist())
+    assert from_store['credit_score'].to_numpy() == pytest.approx(from_ledger['credit_score'].to_numpy())
+
+def test_rerun_skips_unchanged_stages(store_path):
+    pipeline(feature_store_path=store_path).run(['score'], plots=False)
+    rerun = pipeline(feature_store_path=store_path).run(['score'], plots=False)
+    assert rerun.skipped == ['aggregate', 'score']
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+from aggregation import aggregate_shopkeeper_data
+from feature_store import FeatureStore, MonthOrderError
+from ingest import load_ledger
+
+@pytest.fixture
+def ledger():
+    return load_ledger('bizsathi_1000_shopkeepers.csv')
+
+@pytest.fixture
+def store(tmp_path):
+    store = FeatureStore(str(tmp_path / 'features.sqlite'))
+    yield store
+    store.close()
+
+def months_of(ledger, *months):
+    return ledger[ledger['month'].isin(months)]
+
+def assert_matches_ledger(store, ledger):
+    expected = aggregate_shopkeeper_data(ledger)
+    actual = store.features()
+    numeric = expected.columns[3:]
+    np.testing.assert_allclose(actual[numeric].to_numpy(float), expected[numeric].to_numpy(float),
+                               rtol=1e-9, equal_nan=True)
+
+def test_appended_months_match_a_full_aggregation(store, ledger):
+    store.rebuild(months_of(ledger, 'January', 'February', 'March'))
+    for month in ['April', 'May', 'June']:
+        store.append_months(months_of(ledger, month))
+    assert_matches_ledger(store, ledger)
+
+def test_reappending_a_month_is_rejected_and_changes_nothing(store, ledger):
+    store.rebuild(months_of(ledger, 'January', 'February'))
+    before = store.features()
+    with pytest.raises(MonthOrderError):
+        store.append_months(months_of(ledger, 'February'))
+    with pytest.raises(MonthOrderError):
+        store.append_months(months_of(ledger, 'March', 'January'))
+    assert before.equals(store.features())
+
+def test_months_repeated_within_an_upload_are_rejected(store, ledger):
+    march = months_of(ledger, 'March')
+    with pytest.raises(MonthOrderError):
+        store.append_months(march.iloc[[0, 0]])
+    assert store.get(int(march['shopkeeper_id'].iloc[0])) is None
+
+def test_out_of_order_rows_in_one_upload_are_sorted(store, ledger):
+    store.rebuild(months_of(ledger, 'January'))
+    store.append_months(months_of(ledger, 'February', 'March', 'April', 'May', 'June').iloc[::-1])
+    assert_matches_ledger(store, ledger)
@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+import model_store
+from forest_eval import FlatForest, compile_model
+
+N_FEATURES = 11
+
+def training_data(n=400, missing=False, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n, N_FEATURES)) * rng.uniform(1, 1000, size=N_FEATURES)
+    y = X[:, 0] * 0.01 + np.sin(X[:, 1]) * 10 + rng.normal(size=n)
+    if missing:
+        X[rng.random(X.shape) < 0.1] = np.nan
+    return X, y
+
+def forest(missing=False, **params):
+    X, y = training_data(missing=missing)
+    params = {'n_estimators': 20, 'max_depth': 8, 'random_state': 42, **params}
+    return RandomForestRegressor(**params).fit(X, y), X
+
+def split_rows(model, X):
+    """Rows just either side of every split threshold of every tree"""
+    rows = []
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        for node in np.flatnonzero(tree.children_left != -1):
+            threshold = np.float32(tree.threshold[node])
+            if not np.isfinite(threshold):
+                # Splits that only separate missing values; the NaN rows cover them
+                continue
+            for value in (np.nextafter(threshold, -np.inf), threshold, np.nextafter(threshold, np.inf)):
+                row = X[node % len(X)].copy()
+                row[tree.feature[node]] = value
+                rows.append(row)
+    return np.array(rows)
+
+def test_single_rows_match_sklearn():
+    model, X = forest()
+    flat = FlatForest.from_sklearn(model)
+    for row in X[:50]:
+        assert flat.predict(row[None, :])[0] == model.predict(row[None, :])[0]
+
+def test_large_batch_matches_sklearn():
+    model, _ = forest()
+    X, _ = training_data(n=20000, seed=1)
+    np.testing.assert_array_equal(FlatForest.from_sklearn(model).predict(X), model.predict(X))
+
+@pytest.mark.parametrize('missing', [False, True])
+def test_every_split_matches_sklearn(missing):
+    model, X = forest(missing=missing)
+    rows = np.vstack([X, split_rows(model, np.nan_to_num(X))])
+    # The rows reach every node of every tree, so both sides of each split are taken
+    assert model.decision_path(rows)[0].sum(axis=0).min() > 0
+    np.testing.assert_array_equal(FlatForest.from_sklearn(model).predict(rows), model.predict(rows))
+
+def test_unlimited_depth_forest_matches_sklearn():
+    model, X = forest(max_depth=None, n_estimators=5)
+    np.testing.assert_array_equal(FlatForest.from_sklearn(model).predict(X), model.predict(X))
+
+def test_rejects_rows_with_the_wrong_width():
+    model, _ = forest(n_estimators=2)
+    with pytest.raises(ValueError):
+        FlatForest.from_sklearn(model).predict(np.zeros((3, N_FEATURES - 1)))
+
+def test_compile_model_skips_unsupported_models():
+    assert compile_model(object()) is None
+    model, _ = forest(n_estimators=2)
+    flat = compile_model(model)
+    assert compile_model(flat) is flat
+
+def test_model_store_round_trip_memory_maps_the_forest(tmp_path):
+    model, X = forest()
+    root = str(tmp_path / 'models')
+    version = model_store.save_model(model, {'source': 'test'}, root=root)
+
+    loaded = model_store.load_flat_forest(version, root=root)
+    assert isinstance(loaded.threshold, np.memmap)
+    assert not loaded.threshold.flags.writeable
+    rows = np.vstack([X, split_rows(model, X)])
+    np.testing.assert_array_equal(loaded.predict(rows), model.predict(rows))
+
+    stored_model, metadata = model_store.load_model(root=root)
+    assert metadata['version'] == version and metadata['compiled']
+    np.testing.assert_array_equal(loaded.predict(rows), stored_model.predict(rows))
@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+from aggregation import AGGREGATED_COLUMNS, aggregate_shopkeeper_data
+from incremental_stats import ShopkeeperStats
+from ingest import load_ledger, read_ledger, to_month_categorical
+
+METRICS = AGGREGATED_COLUMNS[3:]
+
+def stats_by_shop(ledger):
+    """Fold every shop's months in one at a time, in calendar order"""
+    ledger = ledger.sort_values(['shopkeeper_id', 'month'], kind='mergesort')
+    # Column arrays keep each field's own dtype (int8 etc.), as a row-wise read would not
+    columns = {column: ledger[column].to_numpy() for column in ledger.columns}
+    shops = {}
+    for i in range(len(ledger)):
+        record = {column: values[i] for column, values in columns.items()}
+        shops.setdefault(int(record['shopkeeper_id']), ShopkeeperStats()).add_month(record)
+    return shops
+
+def assert_matches_aggregation(ledger):
+    expected = aggregate_shopkeeper_data(ledger).set_index('shopkeeper_id')
+    shops = stats_by_shop(ledger)
+    assert sorted(shops) == sorted(expected.index)
+    for shop_id, stats in shops.items():
+        metrics = stats.metrics()
+        np.testing.assert_allclose([metrics[name] for name in METRICS],
+                                   expected.loc[shop_id, METRICS].to_numpy(float), rtol=1e-9, equal_nan=True)
+
+def test_plain_dtypes_match_aggregation():
+    ledger = read_ledger('bizsathi_1000_shopkeepers.csv')
+    ledger['month'] = to_month_categorical(ledger['month'])
+    assert_matches_aggregation(ledger)
+
+def test_compact_dtypes_match_aggregation():
+    ledger = load_ledger('bizsathi_1000_shopkeepers.csv')
+    assert ledger['days_active'].dtype == np.int8
+    assert_matches_aggregation(ledger)
+
+def test_small_integer_counts_do_not_overflow():
+    stats = ShopkeeperStats()
+    for _ in range(6):
+        stats.add_month({'transactions': np.int16(30000), 'on_time_payments': np.int8(120),
+                         'missed_payments': np.int8(100), 'avg_transaction_amount': np.float32(10.5),
+                         'days_active': np.int8(30), 'revenue': 1000.0, 'expenses': 800.0, 'profit': 200.0})
+    metrics = stats.metrics()
+    assert metrics['days_active'] == 180
+    assert metrics['on_time_payments'] == 720
+    assert metrics['missed_payments'] == 600
+    assert metrics['transactions_per_month'] == 30000
+
+def test_metrics_after_each_month_match_the_months_so_far():
+    ledger = load_ledger('bizsathi_1000_shopkeepers.csv')
+    shop = ledger[ledger['shopkeeper_id'] == ledger['shopkeeper_id'].iloc[0]].sort_values('month')
+    stats = ShopkeeperStats()
+    for months in range(1, len(shop) + 1):
+        stats.add_month(shop.iloc[months - 1].to_dict())
+        expected = aggregate_shopkeeper_data(shop.iloc[:months]).iloc[0]
+        assert [stats.metrics()[name] for name in METRICS] == pytest.approx(
+            expected[METRICS].to_numpy(float).tolist(), rel=1e-9, nan_ok=True)
@@ -0,0 +1,45 @@
+import os
+import subprocess
+import sys
+from job_store import TrainingJobStore
+
+def test_only_one_job_is_active_until_it_finishes(tmp_path):
+    store = TrainingJobStore(str(tmp_path))
+    job, created = store.create()
+    assert created
+    again, created = store.create()
+    assert not created and again['job_id'] == job['job_id']
+
+    store.finish(job, 'succeeded', model_version=3)
+    assert store.get(job['job_id'])['model_version'] == 3
+    _, created = store.create()
+    assert created
+
+def test_jobs_are_visible_to_other_store_instances(tmp_path):
+    job, _ = TrainingJobStore(str(tmp_path)).create()
+    other = TrainingJobStore(str(tmp_path))
+    assert other.get(job['job_id'])['status'] == 'queued'
+    assert other.create()[0]['job_id'] == job['job_id']
+
+def test_job_of_an_exited_process_is_failed_and_released(tmp_path):
+    store = TrainingJobStore(str(tmp_path))
+    job, _ = store.create()
+    exited = subprocess.Popen([sys.executable, '-c', 'pass'])
+    exited.wait()
+    store.update(job, status='running', pid=exited.pid)
+
+    assert store.get(job['job_id'])['status'] == 'failed'
+    _, created = store.create()
+    assert created
+
+def test_unknown_and_malformed_ids(tmp_path):
+    store = TrainingJobStore(str(tmp_path))
+    assert store.get('0' * 32) is None
+    assert store.get('../' + '0' * 29) is None
+
+def test_old_jobs_are_pruned(tmp_path):
+    store = TrainingJobStore(str(tmp_path), max_jobs=3)
+    for _ in range(5):
+        job, _ = store.create()
+        store.finish(job, 'succeeded')
+    assert len([entry for entry in os.listdir(tmp_path) if entry.endswith('.json')]) == 3
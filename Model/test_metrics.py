@@ -0,0 +1,43 @@
+import os
+import json
+from metrics import MetricsRegistry
+
+def make_registry(directory):
+    registry = MetricsRegistry(directory)
+    requests = registry.counter('requests_total', 'Requests', ('route',))
+    latency = registry.histogram('latency_seconds', 'Latency', ('route',), buckets=(0.1, 1.0))
+    registry.gauge('info', 'Info', callback=lambda: {(): 1})
+    return registry, requests, latency
+
+def test_render_adds_in_other_processes(tmp_path):
+    registry, requests, latency = make_registry(str(tmp_path))
+    requests.inc('/a', amount=2)
+    latency.observe(0.05, '/a')
+    # What another worker flushed
+    with open(tmp_path / '999999.json', 'w') as f:
+        json.dump({'requests_total': [[['/a'], 3], [['/b'], 1]],
+                   'latency_seconds': [[['/a'], [0, 1, 0], 0.5, 1]]}, f)
+
+    lines = registry.render().splitlines()
+    assert 'requests_total{route="/a"} 5' in lines
+    assert 'requests_total{route="/b"} 1' in lines
+    assert 'latency_seconds_bucket{route="/a",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{route="/a",le="1"} 2' in lines
+    assert 'latency_seconds_count{route="/a"} 2' in lines
+    assert 'info 1' in lines
+
+def test_flush_writes_this_process_once(tmp_path):
+    registry, requests, _ = make_registry(str(tmp_path))
+    requests.inc('/a')
+    registry.flush()
+    requests.inc('/a')
+    assert os.listdir(tmp_path) == [f'{os.getpid()}.json']
+    # The own file is stale; live values are used instead of adding it in
+    assert 'requests_total{route="/a"} 2' in registry.render().splitlines()
+
+def test_single_process_registry_writes_nothing(tmp_path):
+    registry, requests, _ = make_registry(None)
+    requests.inc('/a')
+    registry.flush()
+    registry.schedule_flush()
+    assert 'requests_total{route="/a"} 1' in registry.render().splitlines()
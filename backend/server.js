@@ -142,10 +142,44 @@ async function calculateCreditScoreWithPython(data) {
   } catch (error) {
     console.error('Error calling Python API:', error.message);
     // Fallback to JavaScript calculation
-    return calculateCreditScoreJS(data);
+    return fallbackCreditResult(data);
   }
 }
 
+// Score many shopkeepers with one call to the Python batch endpoint
+async function calculateCreditScoresWithPython(records) {
+  try {
+    const response = await axios.post(`${PYTHON_API_URL}/calculate_credit_scores`, records, {
+      timeout: 30000,
+      headers: {
+        'Content-Type': 'application/json'
+      }
+    });
+    return response.data.results.map((result, index) => {
+      if (!result.error) {
+        return result;
+      }
+      // Score records the Python API rejected with the JavaScript fallback
+      return fallbackCreditResult(records[index]);
+    });
+  } catch (error) {
+    console.error('Error calling Python batch API:', error.message);
+    // Fall back to scoring each shopkeeper individually
+    return Promise.all(records.map(calculateCreditScoreWithPython));
+  }
+}
+
+// JavaScript fallback score, shaped like a Python API result
+function fallbackCreditResult(data) {
+  const score = calculateCreditScoreJS(data);
+  return {
+    credit_score: score,
+    risk_category: getRiskCategory(score),
+    calculation_date: new Date().toISOString(),
+    fallback: true
+  };
+}
+
 // Fallback JavaScript credit score calculation
 function calculateCreditScoreJS(data) {
   let score = 50; // Base score
@@ -274,30 +308,26 @@ app.get('/api/shopkeepers', async (req, res) => {
     }
 
     try {
-      // Calculate credit scores using Python API
-      const shopkeepersWithScores = await Promise.all(
-        rows.map(async (row) => {
-          const creditData = {
-            transactions: row.transactions_per_month,
-            on_time_payments: row.on_time_payments,
-            missed_payments: row.missed_payments,
-            avg_transaction_amount: row.avg_transaction_amount,
-            profit: row.monthly_profit_avg,
-            revenue: row.monthly_revenue_avg,
-            expenses: row.monthly_revenue_avg - row.monthly_profit_avg,
-            days_active: row.days_active
-          };
-
-          const creditResult = await calculateCreditScoreWithPython(creditData);
-          
-          return {
-            ...row,
-            credit_score: creditResult.credit_score,
-            risk_category: creditResult.risk_category,
-            credit_calculation_date: creditResult.calculation_date
-          };
-        })
-      );
+      // Calculate credit scores using a single Python API batch request
+      const creditData = rows.map((row) => ({
+        transactions: row.transactions_per_month,
+        on_time_payments: row.on_time_payments,
+        missed_payments: row.missed_payments,
+        avg_transaction_amount: row.avg_transaction_amount,
+        profit: row.monthly_profit_avg,
+        revenue: row.monthly_revenue_avg,
+        expenses: row.monthly_revenue_avg - row.monthly_profit_avg,
+        days_active: row.days_active
+      }));
+
+      const creditResults = await calculateCreditScoresWithPython(creditData);
+
+      const shopkeepersWithScores = rows.map((row, index) => ({
+        ...row,
+        credit_score: creditResults[index].credit_score,
+        risk_category: creditResults[index].risk_category,
+        credit_calculation_date: creditResults[index].calculation_date
+      }));
 
       res.json(shopkeepersWithScores);
     } catch (error) {
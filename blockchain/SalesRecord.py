@@ -1,6 +1,9 @@
+import os
 import hashlib
 import time
 import json
+import pickle
+import tempfile
 from datetime import datetime
 import matplotlib.pyplot as plt
 from matplotlib.gridspec import GridSpec
@@ -8,10 +11,142 @@ import matplotlib.cm as cm
 import matplotlib.colors as mcolors
 import random
 import string
+import bisect
+from concurrent.futures import ProcessPoolExecutor
+from block_log import BlockLog
+
+# Nonces each mining process tries before the workers compare results
+MINING_CHUNK_SIZE = 50000
+
+# Pending sales are mined into a block once there are this many, or once
+# the oldest has waited this long
+MAX_BLOCK_TRANSACTIONS = 100
+MAX_PENDING_SECONDS = 5.0
+
+# A parallel audit splits the chain into this many segments per process
+AUDIT_SEGMENTS_PER_PROCESS = 4
+
+# A stored chain writes an index snapshot every this many blocks, so a
+# restart only indexes the blocks appended since
+SNAPSHOT_EVERY = 1000
+SNAPSHOT_FILE = 'snapshot.pickle'
+SNAPSHOT_VERSION = 1
+
+def merkle_parent(left, right):
+    return hashlib.sha256(bytes.fromhex(left) + bytes.fromhex(right)).hexdigest()
+
+def merkle_levels(leaf_hashes):
+    """Every level of the Merkle tree over ``leaf_hashes``, leaves first
+
+    A level with an odd number of nodes pairs its last node with itself.
+    The last level holds only the root; an empty tree's root is the hash of
+    no data.
+    """
+    levels = [list(leaf_hashes) or [hashlib.sha256(b"").hexdigest()]]
+    while len(levels[-1]) > 1:
+        level = levels[-1]
+        if len(level) % 2:
+            level = level + [level[-1]]
+        levels.append([merkle_parent(level[i], level[i + 1]) for i in range(0, len(level), 2)])
+    return levels
+
+def merkle_root(leaf_hashes):
+    return merkle_levels(leaf_hashes)[-1][0]
+
+def merkle_proof(levels, index):
+    """Sibling hashes from leaf ``index`` up to the root, as (side, hash) pairs"""
+    proof = []
+    for level in levels[:-1]:
+        sibling = index ^ 1
+        if sibling >= len(level):
+            sibling = index
+        proof.append(('left' if sibling < index else 'right', level[sibling]))
+        index //= 2
+    return proof
+
+def verify_merkle_proof(leaf_hash, proof, root):
+    """Whether ``proof`` links ``leaf_hash`` to ``root``"""
+    node = leaf_hash
+    for side, sibling in proof:
+        node = merkle_parent(sibling, node) if side == 'left' else merkle_parent(node, sibling)
+    return node == root
+
+def search_nonces(prefix, tail, difficulty, start, stop):
+    """Lowest nonce in [start, stop) whose block hash meets the difficulty, or None
+
+    ``prefix`` and ``tail`` are the serialised block before and after the
+    nonce (see Block.hash_parts). The prefix is hashed once and each try
+    only feeds the nonce and tail to a copy of that hash state.
+    """
+    target = "0" * difficulty
+    base = hashlib.sha256(prefix)
+    for nonce in range(start, stop):
+        h = base.copy()
+        h.update(b"%d" % nonce + tail)
+        if h.hexdigest().startswith(target):
+            return nonce
+    return None
+
+def find_nonce(prefix, tail, difficulty, start=0, pool=None, processes=1, chunk_size=MINING_CHUNK_SIZE):
+    """Lowest nonce from ``start`` on whose block hash meets the difficulty
+
+    With a process pool the nonce space is split into rounds of
+    ``processes`` consecutive chunks searched in parallel. A round only
+    ends once every chunk is done and the lowest hit wins, so the result is
+    the same nonce a serial search finds.
+    """
+    if pool is None or processes <= 1:
+        nonce = start
+        while True:
+            found = search_nonces(prefix, tail, difficulty, nonce, nonce + chunk_size)
+            if found is not None:
+                return found
+            nonce += chunk_size
+
+    round_start = start
+    while True:
+        futures = [
+            pool.submit(search_nonces, prefix, tail, difficulty,
+                        round_start + i * chunk_size, round_start + (i + 1) * chunk_size)
+            for i in range(processes)
+        ]
+        hits = [nonce for nonce in (future.result() for future in futures) if nonce is not None]
+        if hits:
+            return min(hits)
+        round_start += processes * chunk_size
+
+def verify_blocks(chain, start, stop):
+    """Index of the first invalid block in chain[start:stop], or None
+
+    Each block's hash is recomputed, and each block after ``start`` must
+    link to the one before it. The link from ``start`` to its predecessor
+    is left to the caller.
+    """
+    for i in range(start, stop):
+        current = chain[i]
+
+        # Verify current block's hash
+        if current.hash != current.calculate_hash():
+            return i
+
+        # Verify chain linkage
+        if i > start and current.previous_hash != chain[i - 1].hash:
+            return i
+    return None
+
+# Chain being audited, handed to each audit process when it starts
+_audit_chain = None
+
+def _init_audit_worker(chain):
+    global _audit_chain
+    _audit_chain = chain
+
+def _audit_segment(start, stop):
+    return verify_blocks(_audit_chain, start, stop)
 
 class Product:
     """Represents a product with barcode and details"""
-    def _init_(self, name, price, category):
+    def __init__(self, name, price, category):
         self.barcode = self.generate_barcode()
         self.name = name
         self.price = price
@@ -29,15 +164,33 @@ class Product:
             'category': self.category
         }
 
+    @classmethod
+    def from_dict(cls, data):
+        product = cls.__new__(cls)
+        product.barcode = data['barcode']
+        product.name = data['name']
+        product.price = data['price']
+        product.category = data['category']
+        return product
+
 class SaleTransaction:
     """Represents a sales transaction from POS system"""
-    def _init_(self, store_id, products):
+    def __init__(self, store_id, products):
         self.store_id = store_id
         self.products = products  # List of Product objects
         self.total = sum(p.price for p in products)
         self.timestamp = time.time()
         self.txid = hashlib.sha256(f"{store_id}{self.total}{time.time()}".encode()).hexdigest()[:16]
     
+    def calculate_hash(self):
+        """Merkle leaf hash of this transaction
+
+        Hashes the stored record, whose timestamp is the raw epoch float,
+        rather than to_dict(), whose display timestamp is in local time and
+        would make the hash depend on the process time zone.
+        """
+        return hashlib.sha256(json.dumps(self.to_record(), sort_keys=True).encode()).hexdigest()
+
     def to_dict(self):
         return {
             'txid': self.txid,
@@ -47,31 +200,127 @@ class SaleTransaction:
             'products': [p.to_dict() for p in self.products]
         }
 
+    def to_record(self):
+        """Everything needed to restore the transaction exactly"""
+        return {
+            'txid': self.txid,
+            'store_id': self.store_id,
+            'total': self.total,
+            'timestamp': self.timestamp,
+            'products': [p.to_dict() for p in self.products]
+        }
+
+    @classmethod
+    def from_record(cls, record):
+        tx = cls.__new__(cls)
+        tx.txid = record['txid']
+        tx.store_id = record['store_id']
+        tx.total = record['total']
+        tx.timestamp = record['timestamp']
+        tx.products = [Product.from_dict(product) for product in record['products']]
+        return tx
+
 class Block:
-    def _init_(self, index, transaction, previous_hash):
+    """A batch of sales committed through the Merkle root of their hashes
+
+    The block hash covers only the header (index, Merkle root, previous
+    hash, nonce and timestamp); calculate_hash recomputes the root from the
+    transactions, so tampering with any sale still changes it. The tree is
+    kept so a single sale can be checked with merkle_proof in
+    O(log n) hashes.
+    """
+    def __init__(self, index, transactions, previous_hash):
         self.index = index
-        self.transaction = transaction  # SaleTransaction object
+        self.transactions = list(transactions)  # SaleTransaction objects
         self.previous_hash = previous_hash
         self.nonce = 0
         self.timestamp = time.time()
+        self._merkle_levels = None
+        self.merkle_root = self.merkle_levels[-1][0]
         self.hash = self.calculate_hash()
-    
-    def calculate_hash(self):
-        block_data = {
+
+    @property
+    def merkle_levels(self):
+        """Merkle tree over the transactions, built on first use"""
+        if self._merkle_levels is None:
+            self._merkle_levels = merkle_levels([tx.calculate_hash() for tx in self.transactions])
+        return self._merkle_levels
+
+    def to_record(self):
+        """Everything needed to restore the mined block exactly"""
+        return {
+            'index': self.index,
+            'previous_hash': self.previous_hash,
+            'nonce': self.nonce,
+            'timestamp': self.timestamp,
+            'merkle_root': self.merkle_root,
+            'hash': self.hash,
+            'transactions': [tx.to_record() for tx in self.transactions]
+        }
+
+    @classmethod
+    def from_record(cls, record):
+        """Restore a stored block without rehashing or mining it"""
+        block = cls.__new__(cls)
+        block.index = record['index']
+        block.previous_hash = record['previous_hash']
+        block.nonce = record['nonce']
+        block.timestamp = record['timestamp']
+        block.merkle_root = record['merkle_root']
+        block.hash = record['hash']
+        block.transactions = [SaleTransaction.from_record(tx) for tx in record['transactions']]
+        block._merkle_levels = None
+        return block
+
+    def compute_merkle_root(self):
+        return merkle_root([tx.calculate_hash() for tx in self.transactions])
+
+    def header(self, merkle_root):
+        return {
             'index': self.index,
-            'transaction': self.transaction.to_dict(),
+            'merkle_root': merkle_root,
             'previous_hash': self.previous_hash,
             'nonce': self.nonce,
             'timestamp': self.timestamp
         }
-        block_string = json.dumps(block_data, sort_keys=True).encode()
+
+    def calculate_hash(self):
+        block_string = json.dumps(self.header(self.compute_merkle_root()), sort_keys=True).encode()
         return hashlib.sha256(block_string).hexdigest()
-    
-    def mine_block(self, difficulty):
+
+    def header_hash(self):
+        """Block hash from the stored Merkle root, without rehashing the sales"""
+        return hashlib.sha256(json.dumps(self.header(self.merkle_root), sort_keys=True).encode()).hexdigest()
+
+    def merkle_proof(self, position):
+        """Inclusion proof for the transaction at ``position``"""
+        return merkle_proof(self.merkle_levels, position)
+
+    def hash_parts(self):
+        """Serialised header before and after the nonce
+
+        ``prefix + str(nonce) + tail`` is exactly what calculate_hash hashes:
+        json.dumps sorts the keys, so the nonce follows the index and Merkle
+        root and comes before the previous hash and timestamp.
+        """
+        header = self.header(self.merkle_root)
+        prefix = json.dumps({'index': header['index'], 'merkle_root': header['merkle_root']}, sort_keys=True)
+        rest = json.dumps({'previous_hash': header['previous_hash'], 'timestamp': header['timestamp']},
+                          sort_keys=True)
+        return (prefix[:-1] + ', "nonce": ').encode(), (', ' + rest[1:]).encode()
+
+    def mine_block(self, difficulty, pool=None, processes=1):
+        """Find the lowest nonce from the current one that meets the difficulty
+
+        The block is serialised once; pass a process pool to split the
+        nonce search across ``processes`` workers.
+        """
         target = "0" * difficulty
-        while self.hash[:difficulty] != target:
-            self.nonce += 1
-            self.hash = self.calculate_hash()
+        if self.hash[:difficulty] == target:
+            return
+        prefix, tail = self.hash_parts()
+        self.nonce = find_nonce(prefix, tail, difficulty, self.nonce + 1, pool, processes)
+        self.hash = self.calculate_hash()
     
     def get_short_hash(self, length=6):
         return f"{self.hash[:length]}...{self.hash[-length:]}"
@@ -86,18 +335,199 @@ class Block:
             'previous_hash': self.get_short_prev_hash(),
             'nonce': self.nonce,
             'timestamp': datetime.fromtimestamp(self.timestamp).strftime('%Y-%m-%d %H:%M:%S'),
-            'transaction': self.transaction.to_dict()
+            'merkle_root': self.merkle_root,
+            'transactions': [tx.to_dict() for tx in self.transactions]
         }
 
+class StoredChain:
+    """List-like view of the blocks in a BlockLog
+
+    Opening it reads no blocks; each one is decoded from the memory-mapped
+    log the first time it is accessed and kept. append() writes the block
+    to the log. Pickling it (for non-fork process pools) reopens the log
+    read-only in the receiving process.
+    """
+
+    def __init__(self, log):
+        self.log = log
+        self._blocks = {}
+
+    def __len__(self):
+        return len(self.log)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        block = self._blocks.get(i)
+        if block is None:
+            block = self._blocks[i] = Block.from_record(json.loads(self.log.read(i)))
+        return block
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def append(self, block):
+        self.log.append(json.dumps(block.to_record(), separators=(',', ':')).encode())
+        self._blocks[len(self) - 1] = block
+
+    def __reduce__(self):
+        return _open_stored_chain, (self.log.directory,)
+
+def _open_stored_chain(directory):
+    return StoredChain(BlockLog(directory, readonly=True))
+
 class SalesBlockchain:
-    """Blockchain for storing sales records"""
-    def _init_(self, difficulty=2):
-        self.chain = [self.create_genesis_block()]
+    """Blockchain for storing sales records
+
+    Sales wait in ``pending`` until ``max_block_transactions`` of them have
+    accumulated or the oldest is ``max_pending_seconds`` old. add_sale and
+    every lookup and validation check that and mine the due sales before
+    reading the chain, so a lone sale is committed by the next read.
+    Nothing runs in the background: call mine_pending() to commit the pool
+    without waiting.
+    With ``mining_processes`` above 1 blocks are mined on a pool of worker
+    processes, started on first use and shut down by close().
+
+    Mined sales are indexed by txid, by store and by timestamp as blocks
+    are appended, so verify_sale, get_store_sales and get_sales_between do
+    not walk the chain. Call rebuild_indexes() after replacing ``chain``.
+
+    With a ``path`` the chain is kept in an append-only block log in that
+    directory and reopened from it, decoding blocks only as they are
+    touched. Every ``snapshot_every`` blocks, and on close(), the indexes
+    are saved so reopening only indexes the blocks appended after the last
+    snapshot. The validation checkpoint is not saved: the first
+    is_chain_valid() after reopening checks the whole chain. Pending sales
+    are not stored; call mine_pending() before close() to keep them.
+    """
+    def __init__(self, difficulty=2, mining_processes=1, max_block_transactions=MAX_BLOCK_TRANSACTIONS,
+                 max_pending_seconds=MAX_PENDING_SECONDS, path=None, snapshot_every=SNAPSHOT_EVERY):
+        self.path = path
+        self.snapshot_every = snapshot_every
+        self.snapshot_height = 0
+        if path is None:
+            self.log = None
+            self.chain = [self.create_genesis_block()]
+        else:
+            self.log = BlockLog(path)
+            self.chain = StoredChain(self.log)
+            if not len(self.chain):
+                self.chain.append(self.create_genesis_block())
         self.difficulty = difficulty
+        self.mining_processes = mining_processes
+        self.max_block_transactions = max_block_transactions
+        self.max_pending_seconds = max_pending_seconds
+        self.pending = []
+        self._mining_pool = None
+        # (height, tip hash) of the chain as of the last successful validation
+        self.checkpoint = None
+        if not self.load_snapshot():
+            self.rebuild_indexes()
+
+    def rebuild_indexes(self):
+        """Index every sale on the chain from scratch"""
+        # txid -> (block index, position in block); the first sale with a txid wins
+        self.tx_index = {}
+        # store_id -> [(block index, position)] in chain order
+        self.store_index = {}
+        # Sale timestamps in ascending order, with their (block index, position)
+        self.time_keys = []
+        self.time_positions = []
+        for block in self.chain:
+            self._index_block(block)
+
+    def _index_block(self, block):
+        for position, tx in enumerate(block.transactions):
+            location = (block.index, position)
+            self.tx_index.setdefault(tx.txid, location)
+            self.store_index.setdefault(tx.store_id, []).append(location)
+            if self.time_keys and tx.timestamp < self.time_keys[-1]:
+                at = bisect.bisect_right(self.time_keys, tx.timestamp)
+                self.time_keys.insert(at, tx.timestamp)
+                self.time_positions.insert(at, location)
+            else:
+                self.time_keys.append(tx.timestamp)
+                self.time_positions.append(location)
+
+    def snapshot(self):
+        """Save the indexes next to the block log"""
+        if self.log is None:
+            return
+        # Never let the snapshot cover blocks that are not on disk yet
+        self.log.sync()
+        state = {
+            'version': SNAPSHOT_VERSION,
+            'height': len(self.chain),
+            'tip_hash': self.chain[-1].hash,
+            'tx_index': self.tx_index,
+            'store_index': self.store_index,
+            'time_keys': self.time_keys,
+            'time_positions': self.time_positions
+        }
+        fd, tmp_path = tempfile.mkstemp(dir=self.path, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, os.path.join(self.path, SNAPSHOT_FILE))
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        self.snapshot_height = state['height']
+
+    def load_snapshot(self):
+        """Restore the indexes from the last snapshot; False if there is none usable
+
+        The snapshot is a cache: if it is missing, unreadable or does not
+        match the log, the caller rebuilds the indexes from the chain.
+        """
+        if self.log is None:
+            return False
+        try:
+            with open(os.path.join(self.path, SNAPSHOT_FILE), 'rb') as f:
+                state = pickle.load(f)
+            height = state['height']
+            if (state['version'] != SNAPSHOT_VERSION or not 0 < height <= len(self.chain) or
+                    self.chain[height - 1].hash != state['tip_hash']):
+                return False
+            indexes = (dict(state['tx_index']), dict(state['store_index']),
+                       list(state['time_keys']), list(state['time_positions']))
+        except Exception:
+            # A damaged file can fail to unpickle, or unpickle to anything
+            return False
+
+        self.tx_index, self.store_index, self.time_keys, self.time_positions = indexes
+        self.snapshot_height = height
+        for i in range(height, len(self.chain)):
+            self._index_block(self.chain[i])
+        return True
+
+    def _sale_at(self, location):
+        block_index, position = location
+        return self.chain[block_index].transactions[position]
+
+    def mining_pool(self):
+        if self._mining_pool is None and self.mining_processes > 1:
+            self._mining_pool = ProcessPoolExecutor(self.mining_processes)
+        return self._mining_pool
+
+    def close(self):
+        """Shut down the mining processes and, for a stored chain, snapshot and close the log"""
+        if self._mining_pool is not None:
+            self._mining_pool.shutdown()
+            self._mining_pool = None
+        if self.log is not None:
+            self.snapshot()
+            self.log.close()
+            self.log = None
     
     def create_genesis_block(self):
         genesis_tx = SaleTransaction("System", [])
-        return Block(0, genesis_tx, "0")
+        return Block(0, [genesis_tx], "0")
     
     def get_last_block(self):
         return self.chain[-1]
@@ -106,50 +536,155 @@ class SalesBlockchain:
         return self.get_last_block().hash
     
     def add_sale(self, store_id, products):
-        """Add a new sale to the blockchain"""
+        """Record a new sale; returns the pending SaleTransaction
+
+        The sale is on the chain once its block is mined: here or on the
+        next lookup once the pending pool is full or its oldest sale is due,
+        or by mine_pending().
+        """
         # Create sales transaction
         sale = SaleTransaction(store_id, products)
-        
-        # Create new block
-        new_block = Block(
-            index=len(self.chain),
-            transaction=sale,
-            previous_hash=self.get_last_block().hash
-        )
-        
-        # Mine the block
-        new_block.mine_block(self.difficulty)
-        
-        # Add to chain
-        self.chain.append(new_block)
-        return new_block
+        self.pending.append(sale)
+        self._mine_due()
+        return sale
+
+    def _mine_due(self):
+        # Mine the pending pool if it is full or its oldest sale has waited long enough
+        if self.pending and (len(self.pending) >= self.max_block_transactions or
+                             time.time() - self.pending[0].timestamp >= self.max_pending_seconds):
+            self.mine_pending()
+
+    def mine_pending(self):
+        """Mine pending sales into blocks; returns the new blocks"""
+        blocks = []
+        while self.pending:
+            batch = self.pending[:self.max_block_transactions]
+            del self.pending[:len(batch)]
+
+            # Create new block
+            new_block = Block(
+                index=len(self.chain),
+                transactions=batch,
+                previous_hash=self.get_last_block().hash
+            )
+
+            # Mine the block
+            new_block.mine_block(self.difficulty, self.mining_pool(), self.mining_processes)
+
+            # Add to chain
+            self.chain.append(new_block)
+            self._index_block(new_block)
+            blocks.append(new_block)
+
+            if self.log is not None and len(self.chain) - self.snapshot_height >= self.snapshot_every:
+                self.snapshot()
+        return blocks
     
-    def is_chain_valid(self):
-        for i in range(1, len(self.chain)):
-            current = self.chain[i]
-            previous = self.chain[i-1]
-            
-            # Verify current block's hash
-            if current.hash != current.calculate_hash():
-                return False
-            
-            # Verify chain linkage
-            if current.previous_hash != previous.hash:
+    def is_chain_valid(self, full=False, processes=1):
+        """Verify block hashes and linkage
+
+        By default only the checkpointed block and the blocks appended since
+        the last successful check are verified. ``checkpoint`` is the
+        (height, hash) of the tip at that check; the block at that height is
+        re-hashed on every call, so changing it afterwards is caught, and if
+        its stored hash no longer matches the checkpoint the whole chain is
+        checked. Tampering with blocks below the checkpoint is only caught
+        by a full audit: ``full=True`` verifies every block, split into
+        segments across ``processes`` worker processes when above 1.
+        """
+        self._mine_due()
+        start = 1
+        if not full and self.checkpoint is not None:
+            height, tip_hash = self.checkpoint
+            if height < len(self.chain) and self.chain[height].hash == tip_hash:
+                start = max(height, 1)
+
+        if start < len(self.chain):
+            if self.chain[start].previous_hash != self.chain[start - 1].hash:
+                invalid = start
+            elif processes > 1:
+                invalid = self.audit_blocks(start, processes)
+            else:
+                invalid = verify_blocks(self.chain, start, len(self.chain))
+            if invalid is not None:
+                self.checkpoint = None
                 return False
+
+        self.checkpoint = (len(self.chain) - 1, self.chain[-1].hash)
         return True
+
+    def audit_blocks(self, start, processes):
+        """First invalid block from ``start`` on, verified in parallel segments
+
+        Each worker verifies the hashes and internal links of its segments;
+        the links between segments are checked here.
+        """
+        stop = len(self.chain)
+        segment_count = min(stop - start, processes * AUDIT_SEGMENTS_PER_PROCESS)
+        bounds = [start + (stop - start) * i // segment_count for i in range(segment_count + 1)]
+        segments = list(zip(bounds[:-1], bounds[1:]))
+
+        if self.log is not None:
+            # Workers read the log on disk; they must not inherit unwritten appends
+            self.log.sync()
+        with ProcessPoolExecutor(processes, initializer=_init_audit_worker, initargs=(self.chain,)) as pool:
+            futures = [pool.submit(_audit_segment, first, last) for first, last in segments]
+            results = [future.result() for future in futures]
+
+        for (first, _), invalid in zip(segments, results):
+            # Stitch each segment to the one before it
+            if first > start and self.chain[first].previous_hash != self.chain[first - 1].hash:
+                return first
+            if invalid is not None:
+                return invalid
+        return None
     
     def verify_sale(self, txid):
-        """Verify if a sale exists and hasn't been tampered with"""
-        for block in self.chain:
-            if block.transaction.txid == txid:
-                # Recalculate hash to verify integrity
-                if block.hash == block.calculate_hash():
-                    return True, block
-                return False, block
-        return False, None
+        """Verify if a sale exists and hasn't been tampered with
+
+        Only the sale itself and its Merkle path are hashed: the proof ties
+        the sale to the block's Merkle root, and the header hash ties the
+        root to the mined block hash.
+        """
+        self._mine_due()
+        location = self.tx_index.get(txid)
+        if location is None:
+            return False, None
+        block_index, position = location
+        block = self.chain[block_index]
+        tx = block.transactions[position]
+        valid = (verify_merkle_proof(tx.calculate_hash(), block.merkle_proof(position), block.merkle_root)
+                 and block.hash == block.header_hash())
+        return valid, block
+
+    def get_sale(self, txid):
+        """The mined SaleTransaction with this txid, or None"""
+        self._mine_due()
+        location = self.tx_index.get(txid)
+        return self._sale_at(location) if location is not None else None
+
+    def get_store_sales(self, store_id):
+        """Every mined sale of a store, oldest block first"""
+        self._mine_due()
+        return [self._sale_at(location) for location in self.store_index.get(store_id, [])]
+
+    def get_sales_between(self, start, end):
+        """Mined sales with start <= timestamp < end, in time order
+
+        Bounds are Unix timestamps or datetimes.
+        """
+        self._mine_due()
+        if isinstance(start, datetime):
+            start = start.timestamp()
+        if isinstance(end, datetime):
+            end = end.timestamp()
+        first = bisect.bisect_left(self.time_keys, start)
+        last = bisect.bisect_left(self.time_keys, end)
+        return [self._sale_at(location) for location in self.time_positions[first:last]]
     
     def get_sales_summary(self, store_id=None):
         """Get summary of all sales"""
+        self._mine_due()
         summary = {
             'total_sales': 0,
             'total_revenue': 0,
@@ -157,17 +692,17 @@ class SalesBlockchain:
             'store_sales': {}
         }
         
-        for block in self.chain[1:]:  # Skip genesis block
-            tx = block.transaction
-            
-            # Filter by store if requested
-            if store_id and tx.store_id != store_id:
-                continue
-                
+        # Filter by store if requested; the genesis block is skipped
+        if store_id:
+            sales = [self._sale_at(location) for location in self.store_index.get(store_id, []) if location[0] > 0]
+        else:
+            sales = (tx for block in self.chain[1:] for tx in block.transactions)
+
+        for tx in sales:
             summary['total_sales'] += len(tx.products)
             summary['total_revenue'] += tx.total
             summary['transactions'] += 1
-            
+
             # Track store-specific sales
             if tx.store_id not in summary['store_sales']:
                 summary['store_sales'][tx.store_id] = {
@@ -196,9 +731,9 @@ class SalesBlockchain:
             # Calculate position
             x_position = 100 + i * x_spacing
             
-            # Block color based on store
-            store_id = block.transaction.store_id
-            color = self.get_store_color(store_id)
+            # Block color based on store; blocks mixing stores are grey
+            stores = sorted({tx.store_id for tx in block.transactions})
+            color = self.get_store_color(stores[0]) if len(stores) == 1 else '#DDDDDD'
             
             # Draw block
             block_rect = plt.Rectangle((x_position, y_position), block_width, block_height, 
@@ -212,10 +747,9 @@ class SalesBlockchain:
             
             # Add transaction info for sales blocks
             if block.index > 0:
-                tx = block.transaction
-                block_info += f"Store: {tx.store_id}\n"
-                block_info += f"Items: {len(tx.products)}\n"
-                block_info += f"Total: ${tx.total:.2f}"
+                block_info += f"Stores: {', '.join(stores)}\n"
+                block_info += f"Sales: {len(block.transactions)}\n"
+                block_info += f"Total: ${sum(tx.total for tx in block.transactions):.2f}"
             
             plt.text(x_position + block_width/2, y_position + block_height/2, 
                     block_info, ha='center', va='center', fontsize=10)
@@ -262,14 +796,16 @@ class SalesBlockchain:
             print(f"  Previous: {block.get_short_prev_hash()}")
             print(f"  Nonce: {block.nonce}")
             print(f"  Timestamp: {datetime.fromtimestamp(block.timestamp).strftime('%Y-%m-%d %H:%M:%S')}")
+            print(f"  Merkle root: {block.merkle_root[:6]}...{block.merkle_root[-6:]}")
             
             if block.index > 0:
-                tx = block.transaction
-                print(f"  Store: {tx.store_id}")
-                print(f"  Total: ${tx.total:.2f}")
-                print(f"  Products:")
-                for product in tx.products:
-                    print(f"    - {product.name} (${product.price:.2f}) [Barcode: {product.barcode}]")
+                for tx in block.transactions:
+                    print(f"  Sale {tx.txid}")
+                    print(f"    Store: {tx.store_id}")
+                    print(f"    Total: ${tx.total:.2f}")
+                    print(f"    Products:")
+                    for product in tx.products:
+                        print(f"      - {product.name} (${product.price:.2f}) [Barcode: {product.barcode}]")
         
         # Print verification status
         print("\nBlockchain Valid:", self.is_chain_valid())
@@ -294,9 +830,9 @@ product_catalog = [
 ]
 
 # Create and simulate the blockchain
-if _name_ == "_main_":
-    # Create blockchain with low difficulty for demonstration
-    sales_blockchain = SalesBlockchain(difficulty=2)
+if __name__ == "__main__":
+    # Create blockchain with low difficulty and small blocks for demonstration
+    sales_blockchain = SalesBlockchain(difficulty=2, max_block_transactions=3)
     
     # Simulate POS sales
     print("Simulating POS sales...")
@@ -314,17 +850,20 @@ if _name_ == "_main_":
     sales_blockchain.add_sale("Store-3", [product_catalog[4], product_catalog[5]])
     sales_blockchain.add_sale("Store-3", [product_catalog[1], product_catalog[2], product_catalog[3], product_catalog[6]])
     
+    # Commit the sales still pending
+    sales_blockchain.mine_pending()
+
     # Print blockchain to console
     sales_blockchain.print_blockchain()
     
     # Verify a specific sale
-    tx_to_verify = sales_blockchain.chain[3].transaction.txid
+    tx_to_verify = sales_blockchain.chain[2].transactions[0].txid
     valid, block = sales_blockchain.verify_sale(tx_to_verify)
     print(f"\nVerifying transaction {tx_to_verify}:", "Valid" if valid else "Tampered")
     
     if valid:
         print("Transaction details:")
-        tx = block.transaction
+        tx = next(tx for tx in block.transactions if tx.txid == tx_to_verify)
         print(f"  Store: {tx.store_id}")
         print(f"  Total: ${tx.total:.2f}")
         print(f"  Products:")
@@ -0,0 +1,211 @@
+import os
+import mmap
+import time
+import zlib
+import struct
+import bisect
+from array import array
+
+# Segments are sealed and a new one started past this size
+SEGMENT_MAX_BYTES = 64 * 1024 * 1024
+
+# Appends are fsynced once this many are pending or the last fsync is this old
+SYNC_EVERY = 100
+SYNC_INTERVAL = 1.0  # seconds
+
+# Every record is its payload length and CRC-32, then the payload
+RECORD_HEADER = struct.Struct('<II')
+
+LOG_SUFFIX = '.log'
+INDEX_SUFFIX = '.idx'
+
+class BlockLogError(Exception):
+    """Raised when a stored record fails its checksum"""
+
+class _Segment:
+    """One log file and its offset index, holding records first..first+len-1"""
+
+    def __init__(self, directory, first):
+        self.first = first
+        self.log_path = os.path.join(directory, f'{first:012d}{LOG_SUFFIX}')
+        self.index_path = os.path.join(directory, f'{first:012d}{INDEX_SUFFIX}')
+        self.offsets = array('Q')
+        self.size = 0
+        self._map = None
+        self._mapped_size = 0
+
+    def load(self, active):
+        """Read the offset index and repair a torn tail on the active segment"""
+        self.size = os.path.getsize(self.log_path) if os.path.exists(self.log_path) else 0
+        if os.path.exists(self.index_path):
+            with open(self.index_path, 'rb') as f:
+                data = f.read()
+            self.offsets.frombytes(data[:len(data) - len(data) % self.offsets.itemsize])
+        if active:
+            self._recover()
+
+    def _recover(self):
+        indexed = len(self.offsets)
+        # Drop index entries whose record did not fully reach the log
+        while self.offsets and self._record_end(self.offsets[-1]) is None:
+            self.offsets.pop()
+        changed = len(self.offsets) != indexed
+        # Index records that reached the log but not the index
+        end = self._record_end(self.offsets[-1]) if self.offsets else 0
+        while end < self.size:
+            record_end = self._record_end(end)
+            if record_end is None:
+                break
+            self.offsets.append(end)
+            end = record_end
+            changed = True
+        # Cut a partially written record off the end
+        if end < self.size:
+            with open(self.log_path, 'r+b') as f:
+                f.truncate(end)
+            self.size = end
+        if changed or not os.path.exists(self.index_path) or \
+                os.path.getsize(self.index_path) != len(self.offsets) * self.offsets.itemsize:
+            with open(self.index_path, 'wb') as f:
+                self.offsets.tofile(f)
+
+    def _record_end(self, offset):
+        """End offset of a complete, intact record at offset, or None"""
+        if offset + RECORD_HEADER.size > self.size:
+            return None
+        with open(self.log_path, 'rb') as f:
+            f.seek(offset)
+            length, crc = RECORD_HEADER.unpack(f.read(RECORD_HEADER.size))
+            payload = f.read(length)
+        if len(payload) != length or zlib.crc32(payload) != crc:
+            return None
+        return offset + RECORD_HEADER.size + length
+
+    def read(self, position):
+        offset = self.offsets[position]
+        if self._map is None or offset >= self._mapped_size:
+            # Map (again) to cover records appended since the last mapping
+            self.close()
+            with open(self.log_path, 'rb') as f:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._mapped_size = len(self._map)
+        length, crc = RECORD_HEADER.unpack_from(self._map, offset)
+        start = offset + RECORD_HEADER.size
+        payload = self._map[start:start + length]
+        if zlib.crc32(payload) != crc:
+            raise BlockLogError(f'Record {self.first + position} in {self.log_path} is corrupt')
+        return payload
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+            self._mapped_size = 0
+
+class BlockLog:
+    """Append-only, segmented log of block records on disk
+
+    Records are opaque bytes numbered from 0 in append order. Each segment
+    is a log file of length-and-CRC-prefixed records plus an index file of
+    8-byte record offsets, so opening the log reads only the index files
+    and any record is one lookup away. Records are read through read-only
+    memory maps, so nothing is decoded until it is asked for.
+
+    Appends are written immediately but fsynced in batches of
+    ``sync_every`` records, or on the first append once ``sync_interval``
+    seconds have passed since the last fsync; sync() forces one. A crash can
+    lose at most the unsynced batch: on open, a record cut off mid-write is
+    truncated away and records missing from the index are indexed again.
+
+    A ``readonly`` log never writes, not even to repair a torn tail.
+    """
+
+    def __init__(self, directory, segment_max_bytes=SEGMENT_MAX_BYTES, sync_every=SYNC_EVERY,
+                 sync_interval=SYNC_INTERVAL, readonly=False):
+        self.directory = directory
+        self.segment_max_bytes = segment_max_bytes
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self.readonly = readonly
+        if not readonly:
+            os.makedirs(directory, exist_ok=True)
+
+        firsts = sorted(int(name[:-len(LOG_SUFFIX)]) for name in os.listdir(directory)
+                        if name.endswith(LOG_SUFFIX) and name[:-len(LOG_SUFFIX)].isdigit())
+        self.segments = [_Segment(directory, first) for first in firsts or [0]]
+        for segment in self.segments:
+            segment.load(active=segment is self.segments[-1] and not readonly)
+        self._firsts = [segment.first for segment in self.segments]
+
+        self._log_file = None
+        self._index_file = None
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        if not readonly:
+            self._open_active()
+
+    def __len__(self):
+        active = self.segments[-1]
+        return active.first + len(active.offsets)
+
+    def _open_active(self):
+        active = self.segments[-1]
+        self._log_file = open(active.log_path, 'ab')
+        self._index_file = open(active.index_path, 'ab')
+
+    def append(self, payload):
+        """Append one record; returns its number"""
+        if self.readonly:
+            raise BlockLogError(f'{self.directory} is open read-only')
+        active = self.segments[-1]
+        if active.size >= self.segment_max_bytes and active.offsets:
+            self._roll()
+            active = self.segments[-1]
+
+        number = len(self)
+        self._log_file.write(RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload)
+        self._index_file.write(struct.pack('<Q', active.size))
+        active.offsets.append(active.size)
+        active.size += RECORD_HEADER.size + len(payload)
+
+        self._unsynced += 1
+        if self._unsynced >= self.sync_every or time.monotonic() - self._last_sync >= self.sync_interval:
+            self.sync()
+        return number
+
+    def sync(self):
+        """Flush and fsync pending appends, the log before its index"""
+        for f in (self._log_file, self._index_file):
+            f.flush()
+            os.fsync(f.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def _roll(self):
+        # Seal the active segment and start the next one
+        self.sync()
+        self._log_file.close()
+        self._index_file.close()
+        segment = _Segment(self.directory, len(self))
+        self.segments.append(segment)
+        self._firsts.append(segment.first)
+        self._open_active()
+
+    def read(self, number):
+        """Payload of record ``number``"""
+        if not 0 <= number < len(self):
+            raise IndexError(f'Record {number} is not in the log')
+        segment = self.segments[bisect.bisect_right(self._firsts, number) - 1]
+        if segment is self.segments[-1] and self._unsynced:
+            # The mapping only sees what has left the write buffers
+            self._log_file.flush()
+        return segment.read(number - segment.first)
+
+    def close(self):
+        if self._log_file is not None:
+            self.sync()
+            self._log_file.close()
+            self._index_file.close()
+            self._log_file = self._index_file = None
+        for segment in self.segments:
+            segment.close()
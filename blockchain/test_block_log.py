@@ -0,0 +1,82 @@
+import os
+import pytest
+from block_log import BlockLog, BlockLogError, RECORD_HEADER
+
+def records(n):
+    return [f'block {i}'.encode() * (i + 1) for i in range(n)]
+
+@pytest.fixture
+def directory(tmp_path):
+    return str(tmp_path / 'log')
+
+def write_log(directory, payloads, **kwargs):
+    log = BlockLog(directory, **kwargs)
+    for payload in payloads:
+        log.append(payload)
+    log.close()
+
+def log_path(directory, first=0):
+    return os.path.join(directory, f'{first:012d}.log')
+
+def test_records_round_trip_across_segments(directory):
+    payloads = records(20)
+    write_log(directory, payloads, segment_max_bytes=200)
+    log = BlockLog(directory)
+    assert len(log.segments) > 1
+    assert [log.read(i) for i in range(len(log))] == payloads
+    assert log.append(b'next') == 20
+    log.close()
+
+def test_torn_tail_is_truncated_on_open(directory):
+    payloads = records(3)
+    write_log(directory, payloads)
+    intact_size = os.path.getsize(log_path(directory))
+    with open(log_path(directory), 'ab') as f:
+        # Header of a 100-byte record, but only part of its payload
+        f.write(RECORD_HEADER.pack(100, 0) + b'x' * 10)
+
+    log = BlockLog(directory)
+    assert len(log) == 3
+    assert os.path.getsize(log_path(directory)) == intact_size
+    assert [log.read(i) for i in range(3)] == payloads
+    assert log.append(b'after recovery') == 3
+    log.close()
+    assert BlockLog(directory, readonly=True).read(3) == b'after recovery'
+
+def test_records_missing_from_the_index_are_reindexed(directory):
+    payloads = records(4)
+    write_log(directory, payloads)
+    index_path = os.path.join(directory, f'{0:012d}.idx')
+    with open(index_path, 'r+b') as f:
+        # As if the last two index entries never reached the disk
+        f.truncate(2 * 8)
+
+    log = BlockLog(directory)
+    assert [log.read(i) for i in range(len(log))] == payloads
+    log.close()
+
+def test_corrupt_record_fails_its_checksum(directory):
+    payloads = records(3)
+    write_log(directory, payloads)
+    with open(log_path(directory), 'r+b') as f:
+        f.seek(RECORD_HEADER.size)
+        f.write(b'X')
+
+    log = BlockLog(directory)
+    with pytest.raises(BlockLogError):
+        log.read(0)
+    assert log.read(1) == payloads[1]
+    log.close()
+
+def test_readonly_log_never_writes(directory):
+    write_log(directory, records(2))
+    with open(log_path(directory), 'ab') as f:
+        f.write(b'torn')
+    size = os.path.getsize(log_path(directory))
+
+    log = BlockLog(directory, readonly=True)
+    assert len(log) == 2
+    with pytest.raises(BlockLogError):
+        log.append(b'more')
+    log.close()
+    assert os.path.getsize(log_path(directory)) == size
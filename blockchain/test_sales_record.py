@@ -0,0 +1,222 @@
+import os
+import sys
+import time
+import hashlib
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+import pytest
+from SalesRecord import (Block, SaleTransaction, SalesBlockchain, SNAPSHOT_FILE, find_nonce,
+                         merkle_levels, merkle_proof, merkle_root, product_catalog, verify_merkle_proof)
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+def sales_chain(sales=12, **kwargs):
+    chain = SalesBlockchain(**{'max_block_transactions': 3, **kwargs})
+    for i in range(sales):
+        chain.add_sale(f'Store-{i % 3}', product_catalog[i % 5:i % 5 + 3])
+    chain.mine_pending()
+    return chain
+
+def leaves(n):
+    return [SaleTransaction(f'Store-{i}', product_catalog[:i % 4 + 1]).calculate_hash() for i in range(n)]
+
+def naive_mine(block, difficulty):
+    """The original mining loop: bump the nonce and rehash the whole block"""
+    target = '0' * difficulty
+    while block.hash[:difficulty] != target:
+        block.nonce += 1
+        block.hash = block.calculate_hash()
+
+def unmined_block():
+    transactions = [SaleTransaction('Store-1', product_catalog[:3]), SaleTransaction('Store-2', product_catalog[3:5])]
+    return Block(1, transactions, '0' * 64)
+
+def copy_block(block):
+    return Block.from_record(block.to_record())
+
+def test_mined_nonce_matches_the_original_mining_loop():
+    block = unmined_block()
+    expected = copy_block(block)
+    naive_mine(expected, 3)
+    block.mine_block(3)
+    assert (block.nonce, block.hash) == (expected.nonce, expected.hash)
+
+def test_hash_parts_serialise_the_block_header():
+    block = unmined_block()
+    prefix, tail = block.hash_parts()
+    block.nonce = 12345
+    assert hashlib.sha256(prefix + b'12345' + tail).hexdigest() == block.calculate_hash()
+
+def test_parallel_mining_finds_the_serial_nonce():
+    block = unmined_block()
+    prefix, tail = block.hash_parts()
+    serial = find_nonce(prefix, tail, 3, chunk_size=100)
+    with ProcessPoolExecutor(2) as pool:
+        # Small chunks so the search runs over several rounds
+        assert find_nonce(prefix, tail, 3, pool=pool, processes=2, chunk_size=100) == serial
+
+@pytest.mark.parametrize('n', [1, 2, 3, 5, 8, 9])
+def test_merkle_proofs_verify_every_leaf(n):
+    hashes = leaves(n)
+    levels = merkle_levels(hashes)
+    root = merkle_root(hashes)
+    for index, leaf in enumerate(hashes):
+        assert verify_merkle_proof(leaf, merkle_proof(levels, index), root)
+
+def test_merkle_proofs_reject_tampering():
+    hashes = leaves(5)
+    levels = merkle_levels(hashes)
+    root = merkle_root(hashes)
+    proof = merkle_proof(levels, 2)
+    assert not verify_merkle_proof(hashes[3], proof, root)
+    side, _ = proof[0]
+    assert not verify_merkle_proof(hashes[2], [(side, hashes[0])] + proof[1:], root)
+    assert not verify_merkle_proof(hashes[2], proof, merkle_root(hashes[:4]))
+
+def test_verify_sale_detects_a_tampered_sale():
+    chain = sales_chain()
+    tx = chain.chain[2].transactions[1]
+    assert chain.verify_sale(tx.txid) == (True, chain.chain[2])
+    tx.total += 1
+    assert chain.verify_sale(tx.txid)[0] is False
+    assert chain.verify_sale(chain.chain[3].transactions[0].txid)[0] is True
+    assert chain.verify_sale('unknown') == (False, None)
+
+def test_pending_sales_are_mined_in_blocks():
+    chain = SalesBlockchain(max_block_transactions=3)
+    sales = [chain.add_sale('Store-1', product_catalog[:2]) for _ in range(4)]
+    assert len(chain.chain) == 2 and chain.pending == sales[3:]
+    assert chain.get_sale(sales[3].txid) is None
+    assert len(chain.mine_pending()) == 1
+    assert [chain.get_sale(sale.txid) for sale in sales] == sales
+    assert chain.get_store_sales('Store-1') == sales
+
+def test_a_lone_due_sale_is_mined_by_the_next_read():
+    chain = SalesBlockchain(max_pending_seconds=0.05)
+    sale = chain.add_sale('Store-1', product_catalog[:2])
+    assert chain.pending == [sale]
+    time.sleep(0.1)
+    assert chain.get_sale(sale.txid) is sale
+    assert chain.pending == [] and len(chain.chain) == 2
+    assert chain.verify_sale(sale.txid)[0]
+
+def test_checkpointed_validation_checks_only_new_blocks():
+    chain = sales_chain()
+    assert chain.is_chain_valid()
+    assert chain.checkpoint == (len(chain.chain) - 1, chain.chain[-1].hash)
+
+    # Below the checkpoint: only a full audit sees it
+    chain.chain[1].transactions[0].total += 1
+    assert chain.is_chain_valid()
+    assert not chain.is_chain_valid(full=True)
+    assert chain.checkpoint is None
+    assert not chain.is_chain_valid()
+
+def test_checkpointed_block_is_rehashed():
+    chain = sales_chain()
+    assert chain.is_chain_valid()
+    chain.chain[-1].transactions[0].total += 1
+    assert not chain.is_chain_valid()
+
+def test_blocks_appended_after_the_checkpoint_are_checked():
+    chain = sales_chain()
+    assert chain.is_chain_valid()
+    for i in range(6):
+        chain.add_sale('Store-4', product_catalog[:i + 1])
+    chain.chain[-2].transactions[0].total += 1
+    assert not chain.is_chain_valid()
+
+@pytest.mark.parametrize('tamper', [None, 1, 4, -1])
+def test_parallel_audit_matches_the_serial_one(tamper):
+    chain = sales_chain(sales=30)
+    if tamper is not None:
+        chain.chain[tamper].transactions[0].total += 1
+    serial = chain.is_chain_valid(full=True)
+    assert serial == (tamper is None)
+    assert chain.is_chain_valid(full=True, processes=2) == serial
+
+def test_parallel_audit_catches_a_broken_link():
+    chain = sales_chain(sales=30)
+    block = chain.chain[5]
+    block.previous_hash = '0' * 64
+    block.mine_block(chain.difficulty)
+    assert not chain.is_chain_valid(full=True)
+    assert not chain.is_chain_valid(full=True, processes=2)
+
+def stored_sales(path, sales=12, **kwargs):
+    chain = sales_chain(sales, path=path, **kwargs)
+    chain.close()
+    return chain
+
+def index_state(chain):
+    return chain.tx_index, chain.store_index, chain.time_keys, chain.time_positions
+
+def test_stored_chain_reopens_with_its_indexes(tmp_path):
+    path = str(tmp_path / 'chain')
+    written = stored_sales(path)
+    reopened = SalesBlockchain(path=path)
+    assert [block.hash for block in reopened.chain] == [block.hash for block in written.chain]
+    assert index_state(reopened) == index_state(written)
+    assert reopened.is_chain_valid(full=True)
+    reopened.close()
+
+@pytest.mark.parametrize('damage', [b'not a pickle', b''])
+def test_damaged_snapshot_falls_back_to_a_rebuild(tmp_path, damage):
+    path = str(tmp_path / 'chain')
+    written = stored_sales(path)
+    with open(os.path.join(path, SNAPSHOT_FILE), 'wb') as f:
+        f.write(damage)
+    reopened = SalesBlockchain(path=path)
+    assert reopened.snapshot_height == 0
+    assert index_state(reopened) == index_state(written)
+    reopened.close()
+
+def test_snapshot_of_another_chain_falls_back_to_a_rebuild(tmp_path):
+    path, other = str(tmp_path / 'chain'), str(tmp_path / 'other')
+    written = stored_sales(path)
+    stored_sales(other, sales=20)
+    os.replace(os.path.join(other, SNAPSHOT_FILE), os.path.join(path, SNAPSHOT_FILE))
+    reopened = SalesBlockchain(path=path)
+    assert index_state(reopened) == index_state(written)
+    reopened.close()
+
+def test_blocks_after_the_snapshot_are_indexed_on_reopen(tmp_path):
+    path = str(tmp_path / 'chain')
+    chain = sales_chain(path=path, snapshot_every=2)
+    snapshot_height = chain.snapshot_height
+    # Closing the log without close() leaves the snapshot behind the chain
+    chain.log.close()
+    assert 0 < snapshot_height < len(chain.chain)
+    reopened = SalesBlockchain(path=path)
+    assert reopened.snapshot_height == snapshot_height
+    assert index_state(reopened) == index_state(chain)
+    reopened.close()
+
+WRITE_CHAIN = '''
+import sys
+from SalesRecord import SalesBlockchain, product_catalog
+chain = SalesBlockchain(path=sys.argv[1], max_block_transactions=2)
+for i in range(5):
+    chain.add_sale(f"Store-{i % 2}", product_catalog[:i + 1])
+chain.mine_pending()
+chain.close()
+'''
+
+CHECK_CHAIN = '''
+import sys
+from SalesRecord import SalesBlockchain
+chain = SalesBlockchain(path=sys.argv[1])
+print(chain.is_chain_valid(full=True), all(chain.verify_sale(txid)[0] for txid in chain.tx_index))
+chain.close()
+'''
+
+def run_in_time_zone(script, time_zone, path):
+    env = {**os.environ, 'TZ': time_zone, 'MPLBACKEND': 'Agg'}
+    result = subprocess.run([sys.executable, '-c', script, path], cwd=HERE, env=env,
+                            capture_output=True, text=True, check=True)
+    return result.stdout
+
+def test_chain_stays_valid_when_reopened_in_another_time_zone(tmp_path):
+    path = str(tmp_path / 'chain')
+    run_in_time_zone(WRITE_CHAIN, 'UTC', path)
+    assert run_in_time_zone(CHECK_CHAIN, 'Asia/Kathmandu', path).split() == ['True', 'True']